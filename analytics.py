@@ -0,0 +1,118 @@
+"""
+Incremental monthly aggregates over scraped reviews
+
+Per review month we keep running sums and counts (reviews, recommendations,
+overall rating and each of the 13 category ratings). New reviews are
+grouped with vectorized pandas group-bys and added to the stored sums, so
+averages never require rescanning the full dataset. A small summary CSV
+with the averages is written next to the state for dashboards.
+"""
+
+import os
+
+import pandas as pd
+
+from normalize import CATEGORIES, normalize_frame, reviews_to_frame
+from review_identity import DedupIndex, review_identity
+
+
+SUMS_FILE = 'monthly_sums.csv'
+SUMMARY_FILE = 'monthly_summary.csv'
+SEEN_FILE = 'seen_reviews.db'
+UNKNOWN_MONTH = 'unknown'
+
+# (sum column, count column, source column) of every averaged value
+MEASURES = [('rating_sum', 'rating_count', 'rating')] + [
+    (f"{category}_sum", f"{category}_count", f"{category}_rating") for category in CATEGORIES
+]
+SUM_COLUMNS = ['review_count', 'recommended_count', 'recommendation_known'] + [
+    column for sum_column, count_column, source in MEASURES for column in (sum_column, count_column)
+]
+
+
+def monthly_sums(reviews):
+    """Group reviews by month and return the additive sums/counts (indexed by 'YYYY-MM')"""
+    if not reviews:
+        return pd.DataFrame(columns=SUM_COLUMNS, index=pd.Index([], name='review_month'), dtype='float64')
+
+    df = normalize_frame(reviews_to_frame(reviews))
+    month = df['review_month'].dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+
+    values = pd.DataFrame({'review_count': 1}, index=df.index)
+    recommended = df['recommended']
+    values['recommended_count'] = recommended.fillna(False).astype('int64')
+    values['recommendation_known'] = recommended.notna().astype('int64')
+    for sum_column, count_column, source in MEASURES:
+        if source in df:
+            column = df[source].astype('float64')
+            values[sum_column] = column.fillna(0.0)
+            values[count_column] = column.notna().astype('int64')
+        else:
+            values[sum_column] = 0.0
+            values[count_column] = 0
+
+    sums = values[SUM_COLUMNS].groupby(month.to_numpy()).sum()
+    sums.index.name = 'review_month'
+    return sums
+
+
+def summarize(sums):
+    """Turn sums/counts into averages and ratios per month"""
+    summary = pd.DataFrame(index=sums.index)
+    summary['review_count'] = sums['review_count'].astype('int64')
+    summary['recommendation_ratio'] = sums['recommended_count'] / sums['recommendation_known'].where(
+        sums['recommendation_known'] > 0)
+    for sum_column, count_column, source in MEASURES:
+        name = 'rating_avg' if source == 'rating' else f"{source}_avg"
+        summary[name] = sums[sum_column] / sums[count_column].where(sums[count_column] > 0)
+    return summary.round(3)
+
+
+class MonthlyAggregates:
+    def __init__(self, folder='outputs/analytics'):
+        """Persisted monthly aggregates stored in folder"""
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.sums_path = os.path.join(folder, SUMS_FILE)
+        self.summary_path = os.path.join(folder, SUMMARY_FILE)
+        # Reviews already counted, so re-scraped or merged reviews are not counted twice
+        self.seen = DedupIndex(os.path.join(folder, SEEN_FILE))
+        if os.path.exists(self.sums_path):
+            self.sums = pd.read_csv(self.sums_path, index_col='review_month', dtype={'review_month': str})
+        else:
+            self.sums = monthly_sums([])
+
+    def update(self, reviews):
+        """Add reviews that were not counted before; return how many were added"""
+        new_reviews = {}
+        for review in reviews:
+            identity = review_identity(review)
+            if identity not in self.seen:
+                new_reviews.setdefault(identity, review)
+        if new_reviews:
+            delta = monthly_sums(list(new_reviews.values()))
+            self.sums = self.sums.add(delta, fill_value=0)[SUM_COLUMNS].sort_index()
+            self.save()
+            # Only mark reviews as counted once the sums containing them are on disk
+            for identity in new_reviews:
+                self.seen.add(identity)
+            self.seen.flush()
+        return len(new_reviews)
+
+    def save(self):
+        """Write the running sums and the dashboard summary"""
+        self.sums.to_csv(self.sums_path)
+        summarize(self.sums).to_csv(self.summary_path)
+
+    def summary(self):
+        """Return the averages per month"""
+        return summarize(self.sums)
+
+    def close(self):
+        """Close the index of counted reviews"""
+        self.seen.close()
+
+
+def load_summary(folder='outputs/analytics'):
+    """Load the precomputed monthly summary (no review data is read)"""
+    return pd.read_csv(os.path.join(folder, SUMMARY_FILE), index_col='review_month', dtype={'review_month': str})
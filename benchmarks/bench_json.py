@@ -0,0 +1,64 @@
+"""
+Benchmark: JSON export
+
+Compares the previous writer (json.dump(..., indent=2) of the whole list)
+with exporters.write_json in pretty, compact and JSON Lines mode, using
+orjson when it is installed and the stdlib json module otherwise.
+
+Usage: python benchmarks/bench_json.py [--reviews 12569]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import exporters  # noqa: E402
+from bench_normalize import build_dataset  # noqa: E402
+from normalize import typed_reviews  # noqa: E402
+
+
+def dump_whole_list(reviews, filename):
+    """The previous save_to_json: build the typed list, then json.dump it pretty-printed"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(typed_reviews(reviews), f, ensure_ascii=False, indent=2)
+
+
+def timed(func, *args, repeat=3):
+    """Return the best wall time of repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=12569)
+    args = parser.parse_args()
+
+    reviews = build_dataset(args.reviews)
+    print(f"Dataset: {len(reviews)} reviews, JSON backend: {exporters.json_backend()}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        baseline_path = os.path.join(folder, 'baseline.json')
+        baseline = timed(dump_whole_list, reviews, baseline_path)
+        baseline_size = os.path.getsize(baseline_path)
+        print(f"{'json.dump indent=2':<22} {baseline * 1000:8.1f} ms  {baseline_size / 2**20:6.2f} MB")
+
+        for mode in exporters.JSON_MODES:
+            path = os.path.join(folder, f"reviews.{mode}")
+            elapsed = timed(exporters.write_json, reviews, path, mode)
+            size = os.path.getsize(path)
+            print(f"{'write_json ' + mode:<22} {elapsed * 1000:8.1f} ms  {size / 2**20:6.2f} MB"
+                  f"  ({baseline / elapsed:.1f}x faster, {size / baseline_size:.0%} of size)")
+
+
+if __name__ == "__main__":
+    main()
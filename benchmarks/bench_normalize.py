@@ -0,0 +1,85 @@
+"""
+Benchmark: typed normalization of dates and ratings
+
+Compares the vectorized normalize_frame() against parsing the same columns
+row by row in Python, on a 12,569-review dataset built from outputs/reviews.json.
+
+Usage: python benchmarks/bench_normalize.py [--reviews 12569]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from normalize import CATEGORIES, GERMAN_MONTHS, normalize_frame, reviews_to_frame  # noqa: E402
+
+
+def build_dataset(size, seed=42):
+    """Repeat the archived reviews up to size, with varied dates and ratings"""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    with open(os.path.join(root, 'outputs', 'reviews.json'), encoding='utf-8') as f:
+        archived = json.load(f)
+    rng = random.Random(seed)
+    months = list(GERMAN_MONTHS)
+    reviews = []
+    for i in range(size):
+        review = dict(archived[i % len(archived)])
+        review['review_id'] = f"bench-{i}"
+        review['date'] = f"{rng.choice(months)} {rng.randint(2010, 2025)}"
+        review['rating'] = f"{rng.randint(1, 4)},{rng.randint(0, 9)}"
+        review['category_ratings'] = {c: str(rng.randint(1, 5)) for c in CATEGORIES if rng.random() < 0.7}
+        reviews.append(review)
+    return reviews
+
+
+def normalize_rows(df):
+    """Baseline: parse every cell in a Python loop"""
+    rows = df.to_dict('records')
+    rating_columns = [c for c in df.columns if c.endswith('_rating')]
+    for row in rows:
+        try:
+            row['rating'] = float(str(row['rating']).replace(',', '.'))
+        except ValueError:
+            row['rating'] = None
+        parts = str(row['date']).split()
+        if len(parts) == 2 and parts[0] in GERMAN_MONTHS:
+            row['review_month'] = (int(parts[1]), GERMAN_MONTHS[parts[0]], 1)
+        for column in rating_columns:
+            try:
+                row[column] = int(row[column])
+            except (TypeError, ValueError):
+                row[column] = None
+    return rows
+
+
+def timed(func, *args, repeat=5):
+    """Return the best wall time of repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=12569)
+    args = parser.parse_args()
+
+    df = reviews_to_frame(build_dataset(args.reviews))
+    print(f"Dataset: {len(df)} reviews, {df.shape[1]} columns")
+
+    row_time = timed(normalize_rows, df)
+    vector_time = timed(normalize_frame, df)
+    print(f"Row-by-row parse : {row_time * 1000:8.1f} ms")
+    print(f"normalize_frame  : {vector_time * 1000:8.1f} ms  ({row_time / vector_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
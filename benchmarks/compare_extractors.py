@@ -0,0 +1,118 @@
+"""
+Benchmark: extractor versions side by side
+
+Runs two or more registered extractor versions (see extractors.py) over the
+same archived pages and reports, per version, throughput and peak memory,
+and per field, how often the versions agree with each other (records are
+aligned by their position on the page) and, when the folder has an
+expected.json, how often each version matches the golden dataset (records
+matched by review_id, as in regression.py).
+
+Usage: python benchmarks/compare_extractors.py [--pages DIR] [--versions v1 v2 v3] [--repeat 3]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extractors import available_extractors, get_extractor  # noqa: E402
+from regression import FIXTURES_DIR, PAGE_PATTERN, field_accuracy  # noqa: E402
+
+
+FIELDS = ['review_id', 'title', 'rating', 'recommendation', 'date', 'position', 'department', 'location',
+          'pros', 'cons', 'suggestions', 'categories', 'category_ratings']
+
+
+def load_pages(folder):
+    """Return [(page_num, html bytes)] of the page_<n>.html files in folder"""
+    pages = []
+    for name in os.listdir(folder):
+        match = PAGE_PATTERN.match(name)
+        if match:
+            with open(os.path.join(folder, name), 'rb') as f:
+                pages.append((int(match.group(1)), f.read()))
+    return sorted(pages)
+
+
+def run_version(name, pages, repeat=3):
+    """Extract all pages with one version; return (records per page, best seconds, peak MB)"""
+    best = float('inf')
+    for _ in range(repeat):
+        extract = get_extractor(name)
+        start = time.perf_counter()
+        records = [extract(html) for _, html in pages]
+        best = min(best, time.perf_counter() - start)
+
+    # Memory in a separate pass: tracemalloc slows the extraction down
+    extract = get_extractor(name)
+    tracemalloc.start()
+    for _, html in pages:
+        extract(html)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return records, best, peak
+
+
+def agreement(records_a, records_b):
+    """Return {field: share of aligned records with equal values} (records aligned per page by position)"""
+    pairs = [(a, b) for page_a, page_b in zip(records_a, records_b)
+             for a, b in itertools.zip_longest(page_a, page_b, fillvalue={})]
+    if not pairs:
+        return {field: 1.0 for field in FIELDS}
+    return {field: sum(a.get(field) == b.get(field) for a, b in pairs) / len(pairs) for field in FIELDS}
+
+
+def load_golden(folder):
+    """Return the records of expected.json in folder, or None"""
+    path = os.path.join(folder, 'expected.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def golden_accuracy(records, golden):
+    """Return {field: share of golden records matched exactly} for a version's records per page"""
+    accuracy = field_accuracy(golden, [record for page in records for record in page])
+    return {field: accuracy.get(field, 0.0) for field in FIELDS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', default=FIXTURES_DIR, help="folder with archived page_<n>.html files")
+    parser.add_argument('--versions', nargs='+', default=list(available_extractors()),
+                        choices=list(available_extractors()), help="extractor versions to compare")
+    parser.add_argument('--repeat', type=int, default=3, help="timing runs per version (the best one counts)")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    print(f"{len(pages)} pages from {args.pages}")
+    results = {}
+    print(f"\n{'version':<14} {'reviews':>8} {'pages/s':>9} {'reviews/s':>10} {'peak MB':>8}")
+    for name in args.versions:
+        records, seconds, peak = run_version(name, pages, repeat=args.repeat)
+        results[name] = records
+        count = sum(len(page) for page in records)
+        print(f"{name:<14} {count:>8} {len(pages) / seconds:>9.1f} {count / seconds:>10.0f} {peak:>8.1f}")
+
+    golden = load_golden(args.pages)
+    columns = [f"{a}~{b}" for a, b in itertools.combinations(args.versions, 2)]
+    shares = [agreement(results[a], results[b]) for a, b in itertools.combinations(args.versions, 2)]
+    if golden is not None:
+        columns += [f"{name}=gold" for name in args.versions]
+        shares += [golden_accuracy(results[name], golden) for name in args.versions]
+
+    width = max(12, *(len(column) + 1 for column in columns))
+    print(f"\n{'field':<18}" + ''.join(f"{column:>{width}}" for column in columns))
+    for field in FIELDS:
+        print(f"{field:<18}" + ''.join(f"{share[field]:>{width}.1%}" for share in shares))
+
+
+if __name__ == '__main__':
+    main()
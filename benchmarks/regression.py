@@ -0,0 +1,195 @@
+"""
+Golden-dataset accuracy and speed regression check
+
+Replays fixture pages (page_<n>.html) through an extractor version (v3 by default),
+compares every field with the golden records in expected.json and times the
+extraction of each page in the same run. The results are compared with a
+stored baseline: the check fails (exit code 1) when the accuracy of any
+field drops, or the extraction gets slower, beyond the thresholds.
+
+Absolute times depend on the machine, so speed is judged relative to a
+reference run on the same machine and in the same process: a plain
+BeautifulSoup parse of each page, timed right after its extraction. The golden set must hold non-empty
+values for the fields in REQUIRED_FIELDS, otherwise an extractor that never
+finds them would still score 100% on them.
+
+Fixtures come from benchmarks/synthetic_site.py (write command) or from
+archived real pages saved next to a hand-checked expected.json.
+
+Usage:
+  python benchmarks/regression.py                      # check against the baseline
+  python benchmarks/regression.py --update-baseline    # accept the current results
+  python benchmarks/regression.py --fixtures path/to/archived/pages --speed-threshold 0.5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extractors import available_extractors, get_extractor  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'synthetic')
+BASELINE_FILE = 'baseline.json'
+PAGE_PATTERN = re.compile(r'page_(\d+)\.html$')
+# Fields the golden set has to cover with real values
+REQUIRED_FIELDS = ('rating', 'department', 'location')
+
+
+def load_fixtures(folder):
+    """Return ([(page_num, html bytes)], golden records) of a fixture folder"""
+    pages = []
+    for name in os.listdir(folder):
+        match = PAGE_PATTERN.match(name)
+        if match:
+            with open(os.path.join(folder, name), 'rb') as f:
+                pages.append((int(match.group(1)), f.read()))
+    with open(os.path.join(folder, 'expected.json'), encoding='utf-8') as f:
+        golden = json.load(f)
+    return sorted(pages), golden
+
+
+def reference_parse(html):
+    """The same-machine yardstick for the extractors: a plain BeautifulSoup parse of the page"""
+    return BeautifulSoup(html, 'html.parser').find_all('article')
+
+
+def extract_pages(pages, repeat=5, extractor='v3'):
+    """Parse every page with a fresh extractor; return (records, best seconds per page, best reference seconds)
+
+    Each extraction run is followed by a reference_parse of the same page, so
+    both see the same machine load.
+    """
+    records, timings, reference = [], [], []
+    for page_num, html in pages:
+        best = best_reference = float('inf')
+        for _ in range(repeat):
+            extract = get_extractor(extractor)
+            start = time.perf_counter()
+            reviews = extract(html)
+            best = min(best, time.perf_counter() - start)
+            start = time.perf_counter()
+            reference_parse(html)
+            best_reference = min(best_reference, time.perf_counter() - start)
+        records.extend(reviews)
+        timings.append(best)
+        reference.append(best_reference)
+    return records, timings, reference
+
+
+def missing_golden_values(golden, fields=REQUIRED_FIELDS):
+    """Return the fields that are empty in every golden record"""
+    return [field for field in fields if not any(review.get(field) for review in golden)]
+
+
+def field_accuracy(golden, records):
+    """Return {field: share of golden records whose field was extracted exactly}, matched by review_id
+
+    Golden records without a review_id, or records from an extractor that
+    finds none, are matched by position instead.
+    """
+    if all(review.get('review_id') for review in golden) and any(review.get('review_id') for review in records):
+        found = {review.get('review_id'): review for review in records}
+        pairs = [(review, found.get(review['review_id'], {})) for review in golden]
+    else:
+        pairs = [(review, records[idx] if idx < len(records) else {}) for idx, review in enumerate(golden)]
+    correct = Counter()
+    fields = list(dict.fromkeys(field for review in golden for field in review))
+    for expected, actual in pairs:
+        for field in fields:
+            correct[field] += actual.get(field) == expected.get(field)
+    return {field: round(correct[field] / max(len(golden), 1), 4) for field in fields}
+
+
+def run_check(folder, repeat=5, extractor='v3'):
+    """Extract the fixtures and return the results dict (accuracy, counts, timing)"""
+    pages, golden = load_fixtures(folder)
+    records, timings, reference = extract_pages(pages, repeat=repeat, extractor=extractor)
+    ratios = [seconds / reference_seconds for seconds, reference_seconds in zip(timings, reference) if reference_seconds]
+    return {
+        'extractor': extractor,
+        'pages': len(pages),
+        'golden_reviews': len(golden),
+        'extracted_reviews': len(records),
+        'accuracy': field_accuracy(golden, records),
+        'missing_golden_values': missing_golden_values(golden),
+        'median_page_seconds': statistics.median(timings) if timings else 0.0,
+        'max_page_seconds': max(timings, default=0.0),
+        'median_reference_seconds': statistics.median(reference) if reference else 0.0,
+        'relative_page_time': round(statistics.median(ratios), 4) if ratios else 0.0,
+    }
+
+
+def compare(results, baseline, accuracy_threshold=0.0, speed_threshold=0.25):
+    """Return a list of regressions of results against baseline"""
+    problems = []
+    if results['extracted_reviews'] < baseline['extracted_reviews']:
+        problems.append(f"extracted {results['extracted_reviews']} reviews, baseline {baseline['extracted_reviews']}")
+    for field, base in baseline['accuracy'].items():
+        current = results['accuracy'].get(field, 0.0)
+        if current < base - accuracy_threshold:
+            problems.append(f"{field}: accuracy {current:.1%}, baseline {base:.1%}")
+    # Times relative to the reference parse of this run, so baselines from other machines still apply
+    if baseline.get('relative_page_time'):
+        limit = baseline['relative_page_time'] * (1 + speed_threshold)
+        if results['relative_page_time'] > limit:
+            problems.append(f"median page time {results['relative_page_time']:.2f}x the reference parse, "
+                            f"baseline {baseline['relative_page_time']:.2f}x (limit {limit:.2f}x)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="folder with page_<n>.html and expected.json")
+    parser.add_argument('--baseline', help=f"baseline file (default: <fixtures>/{BASELINE_FILE})")
+    parser.add_argument('--update-baseline', action='store_true', help="store the current results as the baseline")
+    parser.add_argument('--accuracy-threshold', type=float, default=0.0,
+                        help="allowed drop in the accuracy of any field (0.01 = one percentage point)")
+    parser.add_argument('--speed-threshold', type=float, default=0.25,
+                        help="allowed growth of the median time per page relative to the reference parse (0.25 = 25%%)")
+    parser.add_argument('--repeat', type=int, default=5, help="timing runs per page (the best one counts)")
+    parser.add_argument('--extractor', default='v3', choices=list(available_extractors()),
+                        help="extractor version to check (see extractors.py)")
+    args = parser.parse_args()
+    baseline_path = args.baseline or os.path.join(args.fixtures, BASELINE_FILE)
+
+    results = run_check(args.fixtures, repeat=args.repeat, extractor=args.extractor)
+    print(f"{results['pages']} pages, {results['extracted_reviews']}/{results['golden_reviews']} reviews extracted, "
+          f"median {results['median_page_seconds'] * 1000:.1f} ms/page (max {results['max_page_seconds'] * 1000:.1f} ms), "
+          f"{results['relative_page_time']:.2f}x the reference parse")
+    for field, share in results['accuracy'].items():
+        print(f"  {field:<16} {share:7.1%}")
+
+    if results['missing_golden_values']:
+        print(f"\n✗ No golden record has a value for {', '.join(results['missing_golden_values'])}: "
+              f"add expectations with real values to {args.fixtures}/expected.json")
+        sys.exit(1)
+
+    if args.update_baseline or not os.path.exists(baseline_path):
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Baseline written to {baseline_path}")
+        return
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    problems = compare(results, baseline, args.accuracy_threshold, args.speed_threshold)
+    if problems:
+        print("\n✗ Regressions against the baseline:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\n✓ No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
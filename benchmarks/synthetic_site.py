@@ -0,0 +1,407 @@
+"""
+Synthetic Kununu-like review site for offline load testing
+
+Generates a deterministic N-page review listing with the markup that
+KununuScraper.scrape_review relies on (h3 titles, 'score' spans, h4 category
+headers with data-score stars behind hide-star buttons, the "Gut am
+Arbeitgeber finde ich" sections, the "im Bereich ... gearbeitet" line) plus the human-verification page, and
+serves it from a local HTTP server with configurable latency, error rate
+and challenge rate. Every page's expected records are known, so crawls can
+be checked for accuracy as well as timed.
+
+Usage:
+  python benchmarks/synthetic_site.py serve --port 8000 --latency 0.05 --challenge-rate 0.01
+  python benchmarks/synthetic_site.py bench --pages 1257 --mode requests --error-rate 0.01
+  python benchmarks/synthetic_site.py bench --pages 200 --latency 0.05 --jitter 0.05 --tail-rate 0.02 --tail-latency 3 --hedge
+  python benchmarks/synthetic_site.py write outputs/synthetic --pages 20
+"""
+
+import argparse
+import contextlib
+import html
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Unix only; the peak RSS is not reported elsewhere
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from normalize import CATEGORIES, GERMAN_MONTHS  # noqa: E402
+
+
+LISTING_PATH = '/de/synthetic/kommentare'
+REVIEWS_PER_PAGE = 10
+FULL_SITE_REVIEWS = 12569  # 1,257 pages, the size of the real listing
+POSITIONS = ['Angestellte/r oder Arbeiter/in', 'Führungskraft / Management', 'Azubi / Student']
+DEPARTMENTS = ['Logistik / Materialwirtschaft', 'Kundenservice', 'Vertrieb / Verkauf', 'IT', 'Finanzen / Controlling',
+               'Personal / Aus- und Weiterbildung']
+LOCATIONS = ['Bonn', 'Freiburg im Breisgau', 'Hamburg', 'Leipzig', 'Köln', 'Nürnberg']
+
+# Text is assembled from words that contain none of the phrases the scraper
+# searches for (month names, 'Empfohlen', 'Arbeiter', section labels)
+ADJECTIVES = ['gute', 'faire', 'schwierige', 'angenehme', 'stressige', 'solide', 'moderne', 'veraltete',
+              'freundliche', 'klare', 'chaotische', 'flexible', 'starre', 'sichere', 'hektische']
+NOUNS = ['Kollegen', 'Touren', 'Schichten', 'Zustellung', 'Bezahlung', 'Leitung', 'Technik', 'Fahrzeuge',
+         'Pausen', 'Planung', 'Sortierung', 'Teamarbeit', 'Urlaubsplanung', 'Einarbeitung', 'Abteilung']
+VERBS = ['sind', 'wirken', 'bleiben', 'werden', 'scheinen']
+TITLES = ['Solider Arbeitgeber', 'Viel Licht und Schatten', 'Nicht mehr zeitgemäß', 'Sicherer Job',
+          'Gute Kollegen, wenig Anerkennung', 'Hoher Druck in der Zustellung', 'Fairer Umgang',
+          'Wenig Perspektive', 'Top Team vor Ort', 'Es fehlt an Wertschätzung']
+
+HUMAN_CHECK_PAGE = """<!DOCTYPE html>
+<html lang="de"><head><meta charset="utf-8"><title>Let's confirm you are human</title></head>
+<body><main><h1>Let's confirm you are human</h1>
+<p>Complete the security check before continuing.</p><button>Begin</button></main></body></html>
+"""
+
+
+def _sentence(rng, words=8):
+    parts = [rng.choice(ADJECTIVES) + ' ' + rng.choice(NOUNS) for _ in range(max(1, words // 3))]
+    return f"Die {' und '.join(parts)} {rng.choice(VERBS)} {rng.choice(ADJECTIVES)}."
+
+
+def _text(rng, sentences):
+    return ' '.join(_sentence(rng, rng.randint(4, 12)) for _ in range(sentences))
+
+
+class SyntheticSite:
+    def __init__(self, total_reviews=FULL_SITE_REVIEWS, per_page=REVIEWS_PER_PAGE, seed=42):
+        """A deterministic review listing: the same seed always produces the same pages"""
+        self.total_reviews = total_reviews
+        self.per_page = per_page
+        self.seed = seed
+
+    @property
+    def pages(self):
+        return -(-self.total_reviews // self.per_page)
+
+    def review(self, index):
+        """Return review number index (0 = newest) as a record in the shape scrape_review produces"""
+        rng = random.Random(self.seed * 1000003 + index)
+        # Newest first: roughly 80 reviews per month, going back from October 2025
+        months_back = index // 80
+        month = 10 - months_back % 12
+        year = 2025 - months_back // 12
+        if month < 1:
+            month += 12
+            year -= 1
+        month_name = list(GERMAN_MONTHS)[month - 1]
+
+        categories, category_ratings = {}, {}
+        for category in CATEGORIES:
+            if rng.random() < 0.8:
+                category_ratings[category] = rng.randint(1, 5)
+                if rng.random() < 0.5:
+                    categories[category] = _text(rng, rng.randint(1, 2))
+        # Most reviewers name their department, fewer also the location
+        department = rng.choice(DEPARTMENTS) if rng.random() < 0.7 else ''
+        location = rng.choice(LOCATIONS) if department and rng.random() < 0.7 else ''
+        return {
+            'review_id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'title': rng.choice(TITLES),
+            'rating': f"{rng.randint(1, 4)},{rng.randint(0, 9)}",
+            'recommendation': rng.choice(['Empfohlen', 'Nicht empfohlen']),
+            'date': f"{month_name} {year}",
+            'position': rng.choice(POSITIONS),
+            'department': department,
+            'location': location,
+            'pros': _text(rng, rng.randint(1, 4)),
+            'cons': _text(rng, rng.randint(1, 4)),
+            'suggestions': _text(rng, rng.randint(0, 3)),
+            'categories': categories,
+            'category_ratings': category_ratings,
+        }
+
+    def page_reviews(self, page_num):
+        """Return the expected records of one listing page (empty past the last page)"""
+        start = (page_num - 1) * self.per_page
+        return [self.review(index) for index in range(start, min(start + self.per_page, self.total_reviews))]
+
+    def expected_reviews(self, pages=None):
+        """Return the expected records of the given pages (default: all)"""
+        pages = range(1, self.pages + 1) if pages is None else pages
+        return [review for page_num in pages for review in self.page_reviews(page_num)]
+
+    def page_html(self, page_num):
+        """Render one listing page"""
+        reviews = self.page_reviews(page_num)
+        body = ''.join(render_review(review) for review in reviews)
+        if not reviews:
+            body = '<p class="index__empty">Keine weiteren Bewertungen vorhanden.</p>'
+        count = f"{self.total_reviews:,}".replace(',', '.')  # German thousands separator
+        return f"""<!DOCTYPE html>
+<html lang="de"><head><meta charset="utf-8"><title>Synthetic Bewertungen | Seite {page_num}</title></head>
+<body><header><h1>Bewertungen von Synthetic GmbH</h1>
+<div class="index__reviewCount">{count} Bewertungen</div>
+<button id="cookie-accept">Akzeptieren</button></header>
+<main class="index__reviewList">{body}</main>
+<nav><a href="{LISTING_PATH}/{page_num + 1}">Nächste Seite</a></nav></body></html>
+"""
+
+
+def render_review(review):
+    """Render one review with the markup patterns of the real listing"""
+    e = html.escape
+    factors = []
+    for category in CATEGORIES:
+        if category not in review['category_ratings']:
+            continue
+        comment = review['categories'].get(category)
+        factors.append(
+            f'<div class="index__factor__Mo6xW"><h4 class="index__title__2uJ3V">{e(category)}</h4>'
+            f'<div class="index__scoreBlock__wZ4wA"><span class="index__stars__3kLSB" '
+            f'data-score="{review["category_ratings"][category]}" hidden></span></div>'
+            + (f'<p class="index__text__8jcLb">{e(comment)}</p>' if comment else '')
+            + '</div>'
+        )
+    sections = []
+    for label, field in (('Gut am Arbeitgeber finde ich', 'pros'), ('Schlecht am Arbeitgeber finde ich', 'cons'),
+                         ('Verbesserungsvorschläge', 'suggestions')):
+        if review[field]:
+            sections.append(f'<div class="index__section"><h4>{label}</h4><p>{e(review[field])}</p></div>')
+    return (
+        f'<article class="index__reviewBlock__a7HkL" data-review-id="{review["review_id"]}">'
+        f'<div class="index__header"><h3 class="index__title__x1Q">{e(review["title"])}</h3>'
+        f'<span class="index__score__BktQY">{review["rating"]}</span>'
+        f'<span class="index__recommendation">{review["recommendation"]}</span>'
+        f'<time class="index__date">{review["date"]}</time>'
+        f'<span class="index__position">{e(review["position"])}</span>'
+        + (f'<span class="index__workplace">Hat im Bereich {e(review["department"])} bei Synthetic'
+           + (f' in {e(review["location"])}' if review['location'] else '') + ' gearbeitet.</span>'
+           if review['department'] else '')
+        + '</div>'
+        + ''.join(sections)
+        + '<button class="reviews-hide-star" type="button" '
+          'onclick="this.parentElement.querySelectorAll(\'[data-score][hidden]\')'
+          '.forEach(function (s) { s.hidden = false; })">Sterne anzeigen</button>'
+        + ''.join(factors)
+        + f'<a class="index__permalink" href="{LISTING_PATH}/bewertung/{review["review_id"]}">Zur Bewertung</a>'
+        + '</article>'
+    )
+
+
+class SiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, site, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 challenge_rate=0.0, seed=0, tail_rate=0.0, tail_latency=0.0):
+        """Serve a SyntheticSite; each request waits latency + U(0, jitter) seconds and may fail or be challenged
+
+        A tail_rate share of the requests waits tail_latency seconds more (slow backend, stuck connection).
+        """
+        super().__init__((host, port), SiteHandler)
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.challenge_rate = challenge_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{LISTING_PATH}"
+
+    def draw(self):
+        """Return (delay, outcome) for the next request"""
+        with self.lock:
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            if self.rng.random() < self.tail_rate:
+                delay += self.tail_latency
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return delay, 'error'
+        if roll < self.error_rate + self.challenge_rate:
+            return delay, 'challenge'
+        return delay, 'ok'
+
+    def start(self):
+        """Serve in a background thread and return self"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == LISTING_PATH:
+            page_num = 1
+        elif path.startswith(LISTING_PATH + '/') and path[len(LISTING_PATH) + 1:].isdigit():
+            page_num = int(path[len(LISTING_PATH) + 1:])
+        else:
+            self.respond(404, '<h1>Not found</h1>')
+            return
+
+        delay, outcome = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        with self.server.lock:
+            self.server.stats[outcome] += 1
+        if outcome == 'error':
+            self.respond(503, '<h1>Service Unavailable</h1>')
+        elif outcome == 'challenge':
+            self.respond(200, HUMAN_CHECK_PAGE)
+        else:
+            self.respond(200, self.server.site.page_html(page_num))
+
+    def respond(self, status, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+
+def write_site(site, folder, pages=None):
+    """Write page_<n>.html files and expected.json (the records a perfect crawl returns)"""
+    os.makedirs(folder, exist_ok=True)
+    pages = list(range(1, site.pages + 1) if pages is None else pages)
+    for page_num in pages:
+        with open(os.path.join(folder, f"page_{page_num}.html"), 'w', encoding='utf-8') as f:
+            f.write(site.page_html(page_num))
+    with open(os.path.join(folder, 'expected.json'), 'w', encoding='utf-8') as f:
+        json.dump(site.expected_reviews(pages), f, ensure_ascii=False, indent=2)
+    return pages
+
+
+def match_count(expected, scraped):
+    """Return how many expected records were scraped exactly (matched by review_id)"""
+    found = {review['review_id']: review for review in scraped}
+    return sum(1 for review in expected if found.get(review['review_id']) == review)
+
+
+def field_accuracy(expected, scraped):
+    """Return {field: share of expected reviews whose field was scraped correctly}"""
+    found = {review['review_id']: review for review in scraped}
+    correct = Counter()
+    for review in expected:
+        actual = found.get(review['review_id'], {})
+        for field, value in review.items():
+            correct[field] += actual.get(field) == value
+    return {field: correct[field] / max(len(expected), 1) for field in (expected[0] if expected else {})}
+
+
+def run_bench(args):
+    """Crawl the synthetic site with KununuScraper and report throughput and accuracy"""
+    from scraperV3 import KununuScraper
+
+    site = SyntheticSite(args.reviews)
+    pages = list(range(1, min(args.pages, site.pages) + 1))
+    server = SiteServer(site, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        challenge_rate=args.challenge_rate, seed=args.seed, tail_rate=args.tail_rate,
+                        tail_latency=args.tail_latency).start()
+    scraper = KununuScraper(server.base_url, use_selenium=args.mode != 'requests',
+                            extraction_mode='script' if args.mode == 'script' else 'soup',
+                            page_delay=0, load_wait=args.load_wait, hedge=args.hedge)
+    print(f"Serving {site.pages} pages at {server.base_url}, crawling {len(pages)} in {args.mode} mode...")
+
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+        scraper.scrape_all_pages(pages=pages, max_retries=args.max_retries, retry_backoff=args.retry_backoff)
+    elapsed = time.perf_counter() - start
+    server.stop()
+
+    expected = site.expected_reviews(pages)
+    exact = match_count(expected, scraper.reviews_data)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    print(f"Requests served: " + ", ".join(f"{count} {outcome}" for outcome, count in sorted(server.stats.items())))
+    print(f"Crawled {len(pages)} pages in {elapsed:.1f}s ({len(pages) / elapsed:.1f} pages/s)")
+    print(f"Reviews: {len(scraper.reviews_data)} scraped, {len(expected)} expected, {exact} exact matches "
+          f"({exact / max(len(expected), 1):.1%})")
+    inexact = {field: share for field, share in field_accuracy(expected, scraper.reviews_data).items() if share < 1}
+    if inexact:
+        print("Fields not always scraped correctly: "
+              + ", ".join(f"{field} {share:.1%}" for field, share in inexact.items()))
+    if scraper.failed_pages:
+        print(f"Pages never recovered: {len(scraper.failed_pages)}")
+    scraper.latency.report()
+    if scraper.hedger:
+        scraper.hedger.report()
+    if peak_mb is not None:
+        print(f"Peak RSS: {peak_mb:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_site_options(command):
+        command.add_argument('--reviews', type=int, default=FULL_SITE_REVIEWS,
+                             help=f"reviews on the site ({REVIEWS_PER_PAGE} per page, default: full 1,257 pages)")
+        command.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+        command.add_argument('--jitter', type=float, default=0.0, help="extra random latency, up to this many seconds")
+        command.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with 503")
+        command.add_argument('--challenge-rate', type=float, default=0.0,
+                             help="share of requests answered with the human-verification page")
+        command.add_argument('--seed', type=int, default=0, help="seed of the latency/error/challenge draws")
+        command.add_argument('--tail-rate', type=float, default=0.0, help="share of requests that are very slow")
+        command.add_argument('--tail-latency', type=float, default=0.0, help="extra seconds of the slow requests")
+
+    serve = subparsers.add_parser('serve', help="serve the site until interrupted")
+    add_site_options(serve)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+
+    bench = subparsers.add_parser('bench', help="crawl the site with KununuScraper and time it")
+    add_site_options(bench)
+    bench.add_argument('--pages', type=int, default=1257, help="pages to crawl")
+    bench.add_argument('--mode', choices=('requests', 'selenium', 'script'), default='requests',
+                       help="requests, Selenium with BeautifulSoup, or Selenium with in-browser extraction")
+    bench.add_argument('--load-wait', type=float, default=0.2, help="Selenium settle time per step (seconds)")
+    bench.add_argument('--max-retries', type=int, default=3)
+    bench.add_argument('--retry-backoff', type=float, default=0.5)
+    bench.add_argument('--hedge', action='store_true', help="hedge slow fetches (see hedging.py)")
+    bench.add_argument('--verbose', action='store_true', help="show the scraper's own output")
+
+    write = subparsers.add_parser('write', help="write static pages and expected.json")
+    write.add_argument('folder')
+    write.add_argument('--reviews', type=int, default=FULL_SITE_REVIEWS)
+    write.add_argument('--pages', type=int, help="number of pages to write (default: all)")
+
+    args = parser.parse_args()
+    if args.command == 'bench':
+        run_bench(args)
+    elif args.command == 'write':
+        site = SyntheticSite(args.reviews)
+        pages = write_site(site, args.folder, range(1, min(args.pages or site.pages, site.pages) + 1))
+        print(f"Wrote {len(pages)} pages and expected.json to {args.folder}")
+    else:
+        server = SiteServer(SyntheticSite(args.reviews), host=args.host, port=args.port, latency=args.latency,
+                            jitter=args.jitter, error_rate=args.error_rate, challenge_rate=args.challenge_rate,
+                            seed=args.seed, tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+        print(f"Serving {server.site.pages} pages at {server.base_url} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Memory-mapped columnar review files
+
+A reviews.columns/ folder holds one NumPy .npy file per numeric column
+(rating, recommended, review_month and the 13 category ratings) and, for
+every text column, a UTF-8 heap with an .npy array of offsets. The reader
+maps the files instead of loading them, so a rating-only analysis touches
+only the pages of the columns it reads and no text is decoded until asked.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from normalize import EXPORT_COLUMNS
+
+
+META_FILE = 'meta.json'
+# Missing values of the small integer columns (category ratings are 1-5)
+RATING_NA = 0
+RECOMMENDED_NA = -1
+
+
+def column_kind(column):
+    """Storage kind of an export column: 'float32', 'rating', 'bool', 'date' or 'text'"""
+    if column == 'rating':
+        return 'float32'
+    if column == 'recommended':
+        return 'bool'
+    if column == 'review_month':
+        return 'date'
+    if column.endswith('_rating'):
+        return 'rating'
+    return 'text'
+
+
+def _file_stem(idx):
+    # Column names contain '/', spaces and umlauts, so files are numbered
+    return f"c{idx:02d}"
+
+
+def write_columnar(df, folder, columns=EXPORT_COLUMNS):
+    """Write a normalized frame as a memory-mappable columnar folder"""
+    os.makedirs(folder, exist_ok=True)
+    df = df.reindex(columns=columns)
+    meta = {'version': 1, 'rows': len(df), 'columns': []}
+    for idx, column in enumerate(columns):
+        kind = column_kind(column)
+        stem = _file_stem(idx)
+        series = df[column]
+        if kind == 'float32':
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float32', na_value=np.nan)
+        elif kind == 'rating':
+            values = pd.to_numeric(series, errors='coerce').fillna(RATING_NA).to_numpy(dtype='int8')
+        elif kind == 'bool':
+            values = series.astype('boolean').astype('Int8').fillna(RECOMMENDED_NA).to_numpy(dtype='int8')
+        elif kind == 'date':
+            values = pd.to_datetime(series, errors='coerce').to_numpy(dtype='datetime64[D]')
+        else:
+            encoded = [b'' if value is None or value is pd.NA or value != value else str(value).encode('utf-8')
+                       for value in series.astype(object).tolist()]
+            offsets = np.zeros(len(encoded) + 1, dtype='int64')
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            with open(os.path.join(folder, f"{stem}.heap"), 'wb') as f:
+                f.write(b''.join(encoded))
+            values = offsets
+        np.save(os.path.join(folder, f"{stem}.npy"), values)
+        meta['columns'].append({'name': column, 'kind': kind, 'file': stem})
+    with open(os.path.join(folder, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return folder
+
+
+class TextColumn:
+    def __init__(self, heap_path, offsets):
+        """Lazily decoded strings: offsets[i]:offsets[i+1] is row i in the mapped heap"""
+        self.offsets = offsets
+        size = int(offsets[-1]) if len(offsets) else 0
+        self.heap = np.memmap(heap_path, dtype='uint8', mode='r') if size else np.zeros(0, dtype='uint8')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return self.heap[start:end].tobytes().decode('utf-8')
+
+    def lengths(self):
+        """Byte length of every row, without decoding any text"""
+        return np.diff(self.offsets)
+
+
+class ColumnarReviews:
+    def __init__(self, folder):
+        """Open a columnar folder; nothing is read until a column is accessed"""
+        self.folder = folder
+        with open(os.path.join(folder, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._columns = {entry['name']: entry for entry in self.meta['columns']}
+        self._cache = {}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """Return a column as a read-only memory-mapped array (numeric) or a TextColumn"""
+        if name not in self._cache:
+            entry = self._columns[name]
+            values = np.load(os.path.join(self.folder, f"{entry['file']}.npy"), mmap_mode='r')
+            if entry['kind'] == 'text':
+                values = TextColumn(os.path.join(self.folder, f"{entry['file']}.heap"), values)
+            self._cache[name] = values
+        return self._cache[name]
+
+    __getitem__ = column
+
+    def ratings(self):
+        """Return {category: mapped int8 array} of the category ratings (0 = not rated)"""
+        return {name[:-len('_rating')]: self.column(name) for name, entry in self._columns.items()
+                if entry['kind'] == 'rating'}
+
+    def frame(self, columns=None):
+        """Build a pandas frame of the given columns (text is decoded here; missing text reads as '')"""
+        data = {}
+        for name in columns or self.columns:
+            kind = self._columns[name]['kind']
+            values = self.column(name)
+            if kind == 'rating':
+                series = pd.array(np.asarray(values), dtype='Int8')
+                series[values == RATING_NA] = pd.NA
+                data[name] = series
+            elif kind == 'bool':
+                series = pd.array(values == 1, dtype='boolean')
+                series[values == RECOMMENDED_NA] = pd.NA
+                data[name] = series
+            elif kind == 'text':
+                data[name] = values[:]
+            elif kind == 'float32':
+                data[name] = np.asarray(values)
+            elif kind == 'date':
+                data[name] = np.asarray(values, dtype='datetime64[ns]')
+            else:
+                raise ValueError(f"Unknown column kind '{kind}' of column {name}")
+        return pd.DataFrame(data, columns=list(data))
@@ -0,0 +1,233 @@
+"""
+Durable page work-queue for distributed Kununu crawls
+
+A SQLite file acts as the coordinator: it holds every page of the crawl,
+hands out time-limited leases to workers and stores the reviews they send
+back. Leases that expire (worker crashed, hung on a challenge, ...) are
+handed out again to the next worker that asks for work.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+
+from review_identity import DedupIndex, review_identity
+
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class PageQueue:
+    def __init__(self, db_path, lease_seconds=300, max_attempts=3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_num INTEGER PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_status ON pages (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS results (
+                page_num INTEGER PRIMARY KEY,
+                worker TEXT,
+                reviews TEXT NOT NULL,
+                finished_at REAL
+            );
+        """)
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def enqueue(self, pages):
+        """Add pages to the queue (pages already present are left untouched)"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO pages (page_num, status, updated_at) VALUES (?, ?, ?)",
+                [(page_num, PENDING, now) for page_num in pages]
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def lease(self, worker_id):
+        """Lease the next pending (or expired) page to a worker, or return None when nothing is left
+
+        An expired lease that already used up max_attempts marks its page as failed instead.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = self.conn.execute(
+                "UPDATE pages SET status = ?, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, 'lease expired', now, LEASED, now, self.max_attempts)
+            ).rowcount
+            if expired:
+                print(f"{expired} expired lease(s) used up {self.max_attempts} attempts, marked as failed")
+            row = self.conn.execute(
+                "SELECT page_num, status FROM pages "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY page_num LIMIT 1",
+                (PENDING, LEASED, now)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            page_num, status = row
+            if status == LEASED:
+                print(f"Lease on page {page_num} expired, re-issuing it to {worker_id}")
+            self.conn.execute(
+                "UPDATE pages SET status = ?, worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE page_num = ?",
+                (LEASED, worker_id, now + self.lease_seconds, now, page_num)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return page_num
+
+    def complete(self, page_num, worker_id, reviews):
+        """Store the reviews scraped for a page and mark it done"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            status = self.conn.execute(
+                "SELECT status FROM pages WHERE page_num = ?", (page_num,)
+            ).fetchone()
+            if status is None or status[0] == DONE:
+                # Another worker already delivered this page after our lease expired
+                self.conn.execute("COMMIT")
+                return False
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (page_num, worker, reviews, finished_at) VALUES (?, ?, ?, ?)",
+                (page_num, worker_id, json.dumps(reviews, ensure_ascii=False), now)
+            )
+            self.conn.execute(
+                "UPDATE pages SET status = ?, worker = ?, lease_expires = NULL, error = NULL, "
+                "updated_at = ? WHERE page_num = ?",
+                (DONE, worker_id, now, page_num)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def fail(self, page_num, worker_id, error=''):
+        """Release a page after a failed attempt; it is retried until max_attempts is reached"""
+        now = time.time()
+        self.conn.execute(
+            "UPDATE pages SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "lease_expires = NULL, error = ?, updated_at = ? "
+            "WHERE page_num = ? AND worker = ? AND status = ?",
+            (self.max_attempts, FAILED, PENDING, error, now, page_num, worker_id, LEASED)
+        )
+
+    def status(self):
+        """Return the number of pages per status (expired leases count as pending, or failed without attempts left)"""
+        now = time.time()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        rows = self.conn.execute(
+            "SELECT CASE WHEN status = ? AND lease_expires < ? THEN (CASE WHEN attempts >= ? THEN ? ELSE ? END) "
+            "ELSE status END AS s, COUNT(*) FROM pages GROUP BY s",
+            (LEASED, now, self.max_attempts, FAILED, PENDING)
+        )
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+    def failed_pages(self):
+        """Return (page_num, attempts, error) for pages that ran out of attempts"""
+        return self.conn.execute(
+            "SELECT page_num, attempts, error FROM pages WHERE status = ? ORDER BY page_num", (FAILED,)
+        ).fetchall()
+
+    def collect(self):
+        """Return all collected reviews in page order, without duplicates"""
+        reviews = []
+        seen = DedupIndex()
+        for (page_reviews,) in self.conn.execute("SELECT reviews FROM results ORDER BY page_num"):
+            for review in json.loads(page_reviews):
+                # Pages scraped by different workers overlap when new reviews shift the listing
+                if seen.add(review_identity(review)):
+                    reviews.append(review)
+        return reviews
+
+
+def default_worker_id():
+    """Build a worker id that is unique across hosts and processes"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_worker(queue, scraper, worker_id=None, poll_interval=5, exit_when_idle=True, delay=None):
+    """Lease pages from the queue and scrape them with scraper until the queue is drained
+
+    delay (seconds between pages) defaults to the scraper's page_delay.
+    """
+    worker_id = worker_id or default_worker_id()
+    if delay is None:
+        delay = scraper.page_delay
+    print(f"Worker {worker_id} started")
+    scraper.start()
+    pages_done = 0
+    try:
+        while True:
+            page_num = queue.lease(worker_id)
+            if page_num is None:
+                counts = queue.status()
+                if counts[LEASED] == 0 and exit_when_idle:
+                    break
+                # Other workers still hold leases; wait in case one of them expires
+                time.sleep(poll_interval)
+                continue
+
+            reviews = []
+            try:
+                status, reviews = scraper.fetch_page(page_num)
+                error = status
+            except Exception as e:
+                status, error = scraper.PAGE_FAILED, str(e)
+
+            # An empty page is a valid result (past the end of the listing), not a failure
+            if status in (scraper.PAGE_OK, scraper.PAGE_EMPTY):
+                queue.complete(page_num, worker_id, reviews)
+                pages_done += 1
+                print(f"✓ Page {page_num} done ({len(reviews)} reviews)")
+            else:
+                queue.fail(page_num, worker_id, error)
+                print(f"⚠ Page {page_num} failed: {error}")
+
+            # Be respectful - add delay between pages
+            if delay:
+                time.sleep(delay)
+    finally:
+        scraper.close()
+
+    print(f"Worker {worker_id} finished after {pages_done} pages")
+    return pages_done
@@ -0,0 +1,225 @@
+"""
+Time-budgeted crawl with prioritized pages
+
+Pages are ordered by priority: the first (newest) pages of the listing
+come first, then the remaining pages by how long ago they were last
+fetched (never-fetched pages count as the oldest). The crawl runs with
+several scrapers at once and adapts the number of pages in flight to the
+measured page time, so the queue drains before the deadline whenever that
+is possible. A page that would not finish in time is not started: the run
+ends with the reviews of every completed page plus a record of the pages
+that are still pending.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from review_identity import DedupIndex
+
+
+CRAWL_RECORD_FILE = 'crawl_record.json'
+
+
+class PageHistory:
+    def __init__(self, db_path='outputs/page_history.db'):
+        """When each page was last fetched, and with what result"""
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_num INTEGER PRIMARY KEY,
+                last_fetched REAL,
+                last_status TEXT,
+                review_count INTEGER
+            )
+        """)
+
+    def last_fetched(self):
+        """Return {page_num: timestamp of the last successful fetch}"""
+        return dict(self.conn.execute("SELECT page_num, last_fetched FROM pages WHERE last_fetched IS NOT NULL"))
+
+    def record(self, page_num, status, review_count, fetched_at):
+        """Store the outcome of one fetch (failed fetches keep the previous fetch time)"""
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO pages (page_num, last_fetched, last_status, review_count) VALUES (?, ?, ?, ?)
+                ON CONFLICT (page_num) DO UPDATE SET
+                    last_fetched = COALESCE(excluded.last_fetched, last_fetched),
+                    last_status = excluded.last_status,
+                    review_count = COALESCE(excluded.review_count, review_count)
+            """, (page_num, fetched_at, status, review_count))
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+
+def prioritize(pages, last_fetched, recent_pages=5):
+    """Order pages: the first recent_pages pages of the listing, then the rest from stalest to freshest"""
+    pages = sorted(set(pages))
+    recent = [page for page in pages if page <= recent_pages]
+    rest = [page for page in pages if page > recent_pages]
+    rest.sort(key=lambda page: (last_fetched.get(page, float('-inf')), page))
+    return recent + rest
+
+
+class BudgetedCrawl:
+    def __init__(self, make_scraper, budget_seconds, max_workers=4, history=None, recent_pages=5,
+                 max_retries=2, dedup_path=None):
+        """Crawl pages with up to max_workers scrapers (made by make_scraper) within budget_seconds"""
+        self.make_scraper = make_scraper
+        self.budget_seconds = budget_seconds
+        self.max_workers = max(1, max_workers)
+        self.history = history
+        self.recent_pages = recent_pages
+        self.max_retries = max_retries
+        self.seen = DedupIndex(dedup_path)
+        self.page_reviews = {}   # page_num -> unique reviews found on that page
+        self.failed_pages = {}   # page_num -> last status
+        self.pending = []        # pages never attempted or still to retry when the budget ran out
+        self.duplicates_skipped = 0
+        self.concurrency = 1
+        self.page_seconds = None  # moving average of the time per page
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def reviews(self):
+        """The reviews of all completed pages, in page order"""
+        return [review for page_num in sorted(self.page_reviews) for review in self.page_reviews[page_num]]
+
+    def time_left(self):
+        return self.started_at + self.budget_seconds - time.time()
+
+    def _adapt(self, pages_left):
+        """Pick the concurrency that finishes the remaining pages in the remaining time"""
+        if self.page_seconds is None:
+            return
+        time_left = max(self.time_left(), 1e-3)
+        needed = math.ceil(pages_left * self.page_seconds / time_left)
+        self.concurrency = min(self.max_workers, max(1, needed))
+
+    def _fetch(self, scraper, page_num, first):
+        # The politeness delay is part of the page time the deadline planning uses
+        start = time.time()
+        if not first and scraper.page_delay:
+            time.sleep(scraper.page_delay)
+        status, reviews = scraper.fetch_page(page_num)
+        return status, reviews, time.time() - start
+
+    def run(self, pages):
+        """Crawl pages until they are done or the budget is spent"""
+        self.started_at = time.time()
+        last_fetched = self.history.last_fetched() if self.history else {}
+        queue = deque((page, 0) for page in prioritize(pages, last_fetched, self.recent_pages))
+        print(f"Time budget {self.budget_seconds / 60:.1f} min for {len(queue)} pages "
+              f"(up to {self.max_workers} at once, pages 1-{self.recent_pages} first)")
+
+        idle = []
+        fresh = set()  # scrapers that have not fetched a page yet (no politeness delay)
+        end_of_listing = None
+        in_flight = {}
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while queue or in_flight:
+                self._adapt(len(queue) + len(in_flight))
+                # Start pages while there is capacity and time for them to finish
+                while queue and len(in_flight) < self.concurrency:
+                    if self.page_seconds is not None and self.time_left() < self.page_seconds:
+                        break
+                    if self.time_left() <= 0:
+                        break
+                    page_num, attempts = queue.popleft()
+                    if end_of_listing is not None and page_num > end_of_listing:
+                        continue
+                    if idle:
+                        scraper = idle.pop()
+                    else:
+                        scraper = self.make_scraper()
+                        scraper.start()
+                        fresh.add(id(scraper))
+                    first = id(scraper) in fresh
+                    fresh.discard(id(scraper))
+                    future = pool.submit(self._fetch, scraper, page_num, first)
+                    in_flight[future] = (page_num, attempts, scraper)
+                if not in_flight:
+                    break  # no time left to start another page
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_num, attempts, scraper = in_flight.pop(future)
+                    idle.append(scraper)
+                    try:
+                        status, reviews, seconds = future.result()
+                    except Exception as e:
+                        print(f"Error scraping page {page_num}: {e}")
+                        status, reviews, seconds = scraper.PAGE_FAILED, [], None
+                    if seconds is not None:
+                        self.page_seconds = seconds if self.page_seconds is None else (
+                            0.7 * self.page_seconds + 0.3 * seconds)
+
+                    if status in (scraper.PAGE_OK, scraper.PAGE_EMPTY):
+                        unique = []
+                        for review in reviews:
+                            if self.seen.add(review['review_id']):
+                                unique.append(review)
+                            else:
+                                self.duplicates_skipped += 1
+                        self.page_reviews[page_num] = unique
+                        self.failed_pages.pop(page_num, None)
+                        if self.history:
+                            self.history.record(page_num, status, len(reviews), time.time())
+                        if status == scraper.PAGE_EMPTY:
+                            end_of_listing = page_num if end_of_listing is None else min(end_of_listing, page_num)
+                            queue = deque(item for item in queue if item[0] < end_of_listing)
+                    else:
+                        self.failed_pages[page_num] = status
+                        if self.history:
+                            self.history.record(page_num, status, None, None)
+                        if status == scraper.PAGE_CHALLENGED:
+                            # Back off: fewer pages at once draw fewer challenges
+                            self.max_workers = max(1, self.max_workers - 1)
+                        if attempts < self.max_retries:
+                            queue.append((page_num, attempts + 1))
+        finally:
+            pool.shutdown(wait=True)
+            for scraper in idle:
+                scraper.close()
+            self.seen.flush()
+
+        self.finished_at = time.time()
+        self.pending = sorted(page for page, _ in queue
+                              if page not in self.page_reviews and (end_of_listing is None or page <= end_of_listing))
+        print(f"Crawled {len(self.page_reviews)} pages in {self.finished_at - self.started_at:.0f}s, "
+              f"{len(self.reviews)} reviews, {len(self.pending)} pages pending, {len(self.failed_pages)} failed")
+        return self.reviews
+
+    def record(self):
+        """Summary of the run: completed, failed and pending pages"""
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat(timespec='seconds'),
+            'budget_seconds': self.budget_seconds,
+            'completed_pages': sorted(self.page_reviews),
+            'failed_pages': {str(page): status for page, status in sorted(self.failed_pages.items())
+                             if page not in self.pending},
+            'pending_pages': self.pending,
+            'review_count': sum(len(reviews) for reviews in self.page_reviews.values()),
+        }
+
+    def write_record(self, folder):
+        """Write crawl_record.json into folder; return its path"""
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, CRAWL_RECORD_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.record(), f, indent=2)
+        return path
@@ -0,0 +1,130 @@
+"""
+Partitioned review dataset with a manifest
+
+Reviews are stored as JSON Lines partitions by review month
+(<root>/month=YYYY-MM/reviews.jsonl) and manifest.json records every
+partition's path, row count and content hash. A run only rewrites the
+partitions it touched, and readers load just the months they ask for.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from exporters import encode_json, read_json
+from normalize import typed_reviews
+from review_identity import review_identity
+
+
+MANIFEST_FILE = 'manifest.json'
+UNKNOWN_PARTITION = 'unknown'
+
+
+def partition_key(review):
+    """Partition of a typed review: its review month as YYYY-MM"""
+    month = review.get('review_month')
+    return month[:7] if month else UNKNOWN_PARTITION
+
+
+def _atomic_write(path, data):
+    """Write bytes to path via a temporary file, so readers never see a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class DatasetStore:
+    def __init__(self, root='outputs/dataset'):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'version': 1, 'partitions': {}}
+
+    def partitions(self):
+        """Return the manifest entries of all partitions, ordered by month"""
+        return dict(sorted(self.manifest['partitions'].items()))
+
+    def _partition_path(self, key):
+        return os.path.join(self.root, f"month={key}", 'reviews.jsonl')
+
+    def _load_partition(self, key):
+        entry = self.manifest['partitions'].get(key)
+        if not entry:
+            return []
+        return read_json(os.path.join(self.root, entry['path']))
+
+    def write(self, reviews, mode='append'):
+        """Add reviews to their month partitions; return the partitions that were written
+
+        'append' merges with the existing rows (a review with the same identity
+        is replaced); 'replace' overwrites each touched partition with the new
+        rows only. Untouched partitions are never read or rewritten.
+        """
+        if mode not in ('append', 'replace'):
+            raise ValueError(f"Unknown write mode: {mode}")
+        grouped = {}
+        for review in typed_reviews(reviews):
+            review['review_id'] = review_identity(review)
+            grouped.setdefault(partition_key(review), {})[review['review_id']] = review
+
+        written = []
+        for key, new_rows in sorted(grouped.items()):
+            rows = {}
+            if mode == 'append':
+                rows = {review['review_id']: review for review in self._load_partition(key)}
+            unchanged = mode == 'append' and all(rows.get(rid) == review for rid, review in new_rows.items())
+            if unchanged:
+                continue
+            rows.update(new_rows)
+
+            data = b''.join(encode_json(review) + b'\n' for review in rows.values())
+            path = self._partition_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, data)
+            self.manifest['partitions'][key] = {
+                'path': os.path.relpath(path, self.root).replace(os.sep, '/'),
+                'rows': len(rows),
+                'sha256': hashlib.sha256(data).hexdigest(),
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            written.append(key)
+
+        if written:
+            self.manifest['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self.manifest['total_rows'] = sum(entry['rows'] for entry in self.manifest['partitions'].values())
+            _atomic_write(self.manifest_path,
+                          json.dumps(self.manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+        return written
+
+    def read(self, month_from=None, month_to=None, include_unknown=False):
+        """Load the reviews of months month_from..month_to ('YYYY-MM', inclusive) from their partitions only"""
+        reviews = []
+        for key in self.partitions():
+            if key == UNKNOWN_PARTITION:
+                if include_unknown:
+                    reviews.extend(self._load_partition(key))
+                continue
+            if (month_from and key < month_from) or (month_to and key > month_to):
+                continue
+            reviews.extend(self._load_partition(key))
+        return reviews
+
+    def verify(self):
+        """Check every partition against the manifest; return a list of problems (empty if all is well)"""
+        problems = []
+        for key, entry in self.partitions().items():
+            path = os.path.join(self.root, entry['path'])
+            if not os.path.exists(path):
+                problems.append(f"{key}: missing file {entry['path']}")
+                continue
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if digest != entry['sha256']:
+                problems.append(f"{key}: content hash mismatch")
+        return problems
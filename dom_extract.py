@@ -0,0 +1,162 @@
+"""
+In-browser review extraction for Selenium mode
+
+Instead of serializing the rendered DOM through driver.page_source and
+re-parsing it with BeautifulSoup, one injected script walks the review
+elements in the live DOM and returns the same records as
+KununuScraper.scrape_review, for the whole page in a single round trip.
+"""
+
+from normalize import CATEGORIES, GERMAN_MONTHS
+
+
+# Cheap challenge check: only the title and headings are read, not the whole document
+HUMAN_CHECK_JS = """
+const texts = [document.title];
+document.querySelectorAll('h1, h2').forEach(h => texts.push(h.textContent || ''));
+const text = texts.join(' ').toLowerCase();
+return text.includes('confirm you are human') || text.includes('lets confirm you are human');
+"""
+
+# Mirrors scrape_review: arguments[0] = category names, arguments[1] = German month names
+EXTRACT_REVIEWS_JS = r"""
+const categories = arguments[0];
+const months = arguments[1];
+const UUID = /[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/i;
+const WORKPLACE = /im Bereich\s+(.+?)(?:\s+bei\s+.+?)?(?:\s+in\s+(.+?))?\s+gearbeitet/;
+
+// Same as BeautifulSoup get_text(strip=True): stripped text nodes, concatenated
+function getText(el) {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    let out = '';
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        out += node.nodeValue.trim();
+    }
+    return out;
+}
+
+function findText(el, predicate) {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        if (predicate(node.nodeValue)) return node;
+    }
+    return null;
+}
+
+function labelledText(el, label) {
+    const node = findText(el, t => t.includes(label));
+    const next = node && node.parentElement && node.parentElement.nextElementSibling;
+    return next ? getText(next) : '';
+}
+
+function siteReviewId(el) {
+    for (const attr of ['data-review-id', 'data-review-uuid', 'data-id', 'id']) {
+        const match = (el.getAttribute(attr) || '').match(UUID);
+        if (match) return match[0].toLowerCase();
+    }
+    for (const link of el.querySelectorAll('a[href]')) {
+        const match = link.getAttribute('href').match(UUID);
+        if (match) return match[0].toLowerCase();
+    }
+    return '';
+}
+
+function nextScore(container) {
+    // First span[data-score] after the start of container in document order (BeautifulSoup find_next)
+    for (const span of document.querySelectorAll('span[data-score]')) {
+        const position = container.compareDocumentPosition(span);
+        if (position & (Node.DOCUMENT_POSITION_FOLLOWING | Node.DOCUMENT_POSITION_CONTAINED_BY)) return span;
+    }
+    return null;
+}
+
+// Same as is_position_text in scraperV3.py
+function isPositionText(t) {
+    let text = t.trim();
+    if (text.startsWith('Ex-')) text = text.slice(3);
+    return ['Angestellte', 'Arbeiter'].some(word => text.includes(word))
+        || ['Führungskraft', 'Azubi', 'Auszubildende', 'Student', 'Praktikant', 'Freelancer'].some(label => text.startsWith(label));
+}
+
+function scrapeReview(el) {
+    const review = {
+        review_id: siteReviewId(el), title: '', rating: '', recommendation: '', date: '',
+        position: '', department: '', location: '', pros: '', cons: '', suggestions: '',
+        categories: {}, category_ratings: {}
+    };
+    const title = el.querySelector('h3');
+    if (title) review.title = getText(title);
+
+    const score = Array.from(el.querySelectorAll('span[class]'))
+        .find(span => span.className.toString().toLowerCase().includes('score'));
+    if (score) {
+        const text = getText(score);
+        if (/\d/.test(text)) review.rating = text;
+    }
+
+    const recommendation = findText(el, t => t.includes('Empfohlen') || t.includes('Nicht empfohlen'));
+    if (recommendation) review.recommendation = recommendation.nodeValue.trim();
+    const date = findText(el, t => months.some(month => t.includes(month)));
+    if (date) review.date = date.nodeValue.trim();
+    const position = findText(el, isPositionText);
+    if (position) review.position = position.nodeValue.trim();
+    const workplace = findText(el, t => WORKPLACE.test(t));
+    if (workplace) {
+        const match = workplace.nodeValue.match(WORKPLACE);
+        review.department = match[1].trim();
+        review.location = (match[2] || '').trim();
+    }
+
+    review.pros = labelledText(el, 'Gut am Arbeitgeber finde ich');
+    review.cons = labelledText(el, 'Schlecht am Arbeitgeber finde ich');
+    review.suggestions = labelledText(el, 'Verbesserungsvorschläge');
+
+    const headers = Array.from(el.querySelectorAll('h4'));
+    for (const category of categories) {
+        const h4 = headers.find(h => getText(h).includes(category));
+        if (!h4 || !h4.parentElement) continue;
+        const container = h4.parentElement;
+
+        const comment = container.querySelector('p');
+        if (comment) {
+            const text = getText(comment);
+            if (text && text !== 'Flex' && text !== '== $0') review.categories[category] = text;
+        }
+
+        let span = null;
+        let sibling = h4.nextElementSibling;
+        while (sibling && sibling.tagName !== 'DIV') sibling = sibling.nextElementSibling;
+        if (sibling) span = sibling.querySelector('span[data-score]');
+        if (!span) {
+            let parentNext = container.nextElementSibling;
+            while (parentNext && parentNext.tagName !== 'DIV') parentNext = parentNext.nextElementSibling;
+            if (parentNext) span = parentNext.querySelector('span[data-score]');
+        }
+        if (!span) span = nextScore(container);
+
+        const value = span ? span.getAttribute('data-score') : '';
+        // Only integer scores 1-5 are category ratings (decimals are overall ratings)
+        if (value && /^\d+$/.test(value.trim())) {
+            const stars = parseInt(value, 10);
+            if (stars >= 1 && stars <= 5) review.category_ratings[category] = stars;
+        }
+    }
+    return review;
+}
+
+let elements = Array.from(document.querySelectorAll('article'));
+if (!elements.length) elements = Array.from(document.querySelectorAll('div[class*="review" i]'));
+if (!elements.length) elements = Array.from(document.querySelectorAll('[data-testid*="review" i]'));
+if (!elements.length) elements = Array.from(document.querySelectorAll('div[class*="index__"], div[class*="card" i]'));
+return elements.map(scrapeReview);
+"""
+
+
+def is_human_check(driver):
+    """Return True if the browser is showing the human-verification page"""
+    return bool(driver.execute_script(HUMAN_CHECK_JS))
+
+
+def extract_reviews(driver):
+    """Extract all review records of the current page in one script call"""
+    return driver.execute_script(EXTRACT_REVIEWS_JS, CATEGORIES, list(GERMAN_MONTHS)) or []
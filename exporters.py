@@ -0,0 +1,323 @@
+"""
+Streaming exporters for large crawls
+
+The Excel writer streams rows straight into the workbook instead of building
+a DataFrame and writing it in openpyxl's normal (in-memory) mode. The JSON
+writer encodes one review at a time (with orjson when it is installed) and
+supports pretty, compact and JSON Lines output. Reviews are normalized in
+chunks, so memory stays flat no matter how many rows are written.
+
+export_all prepares the data once and writes every requested format
+concurrently, so the slowest format bounds the total export time.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from columnar import write_columnar
+from normalize import EXPORT_COLUMNS, normalize_frame, reviews_to_frame, typed_reviews
+from review_store import ReviewStore
+
+try:
+    import xlsxwriter
+except ImportError:  # optional, openpyxl's write-only mode is used instead
+    xlsxwriter = None
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib json module is used instead
+    orjson = None
+
+
+JSON_MODES = ('pretty', 'compact', 'jsonl')
+EXPORT_FILENAMES = {'json': 'reviews.json', 'csv': 'reviews.csv', 'xlsx': 'reviews.xlsx', 'sqlite': 'reviews.db',
+                    'columnar': 'reviews.columns'}
+EXCEL_MAX_ROWS = 1048576  # rows per sheet, including the header row
+EXCEL_MAX_CELL_CHARS = 32767
+DATE_FORMAT = 'yyyy-mm-dd'
+
+
+def frame_rows(df, columns=EXPORT_COLUMNS):
+    """Yield the rows of a normalized frame as lists of plain Python values (None for missing)"""
+    df = df.reindex(columns=columns)
+    values = []
+    for column in columns:
+        series = df[column].astype(object)
+        values.append(series.where(series.notna(), None).tolist())
+    for row in zip(*values):
+        yield list(row)
+
+
+class StreamingExcelWriter:
+    def __init__(self, filename, columns=EXPORT_COLUMNS, engine='auto', sheet_name='Reviews',
+                 max_rows_per_sheet=EXCEL_MAX_ROWS - 1, max_sheet_chars=None):
+        """Write rows to an .xlsx file as they arrive, starting a new sheet when a limit is hit
+
+        engine is 'xlsxwriter' (constant_memory mode), 'openpyxl' (write_only
+        mode) or 'auto' (xlsxwriter when installed). max_sheet_chars optionally
+        caps the amount of text per sheet to keep single sheets manageable.
+        """
+        if engine == 'auto':
+            engine = 'xlsxwriter' if xlsxwriter is not None else 'openpyxl'
+        self.filename = filename
+        self.columns = list(columns)
+        self.engine = engine
+        self.sheet_name = sheet_name
+        self.max_rows_per_sheet = min(max_rows_per_sheet, EXCEL_MAX_ROWS - 1)
+        self.max_sheet_chars = max_sheet_chars
+        self.rows_written = 0
+        self.sheet_count = 0
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheet_chars = 0
+        self._date_columns = {self.columns.index('review_month')} if 'review_month' in self.columns else set()
+
+        folder = os.path.dirname(filename)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if engine == 'xlsxwriter':
+            self._workbook = xlsxwriter.Workbook(filename, {
+                'constant_memory': True,
+                'default_date_format': DATE_FORMAT,
+                'strings_to_urls': False,
+                'strings_to_formulas': False,
+            })
+        elif engine == 'openpyxl':
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+        else:
+            raise ValueError(f"Unknown Excel engine: {engine}")
+
+    def _new_sheet(self):
+        self.sheet_count += 1
+        title = self.sheet_name if self.sheet_count == 1 else f"{self.sheet_name} {self.sheet_count}"
+        if self.engine == 'xlsxwriter':
+            self._sheet = self._workbook.add_worksheet(title)
+            self._sheet.write_row(0, 0, self.columns)
+        else:
+            self._sheet = self._workbook.create_sheet(title)
+            self._sheet.append(self.columns)
+        self._sheet_rows = 0
+        self._sheet_chars = 0
+
+    def _prepare(self, row):
+        """Truncate cells Excel can't hold and return the row's text size"""
+        chars = 0
+        for idx, value in enumerate(row):
+            if isinstance(value, str):
+                if len(value) > EXCEL_MAX_CELL_CHARS:
+                    value = row[idx] = value[:EXCEL_MAX_CELL_CHARS]
+                chars += len(value)
+        return chars
+
+    def write_row(self, row):
+        """Append one row (a list of values in column order)"""
+        chars = self._prepare(row)
+        if (self._sheet is None or self._sheet_rows >= self.max_rows_per_sheet
+                or (self.max_sheet_chars and self._sheet_rows and self._sheet_chars + chars > self.max_sheet_chars)):
+            self._new_sheet()
+        if self.engine == 'xlsxwriter':
+            self._sheet.write_row(self._sheet_rows + 1, 0, row)
+        else:
+            self._sheet.append(self._openpyxl_cells(row))
+        self._sheet_rows += 1
+        self._sheet_chars += chars
+        self.rows_written += 1
+
+    def _openpyxl_cells(self, row):
+        if not self._date_columns:
+            return row
+        from openpyxl.cell import WriteOnlyCell
+        for idx in self._date_columns:
+            if row[idx] is not None:
+                cell = WriteOnlyCell(self._sheet, value=row[idx])
+                cell.number_format = DATE_FORMAT
+                row[idx] = cell
+        return row
+
+    def write_reviews(self, reviews):
+        """Normalize a chunk of scraped review dicts and append them"""
+        if not reviews:
+            return
+        self.write_frame(normalize_frame(reviews_to_frame(reviews)))
+
+    def write_frame(self, df):
+        """Append the rows of an already normalized frame"""
+        for row in frame_rows(df, self.columns):
+            self.write_row(row)
+
+    def close(self):
+        """Finish the workbook (an empty header-only sheet is written if no rows arrived)"""
+        if self._sheet is None:
+            self._new_sheet()
+        if self.engine == 'xlsxwriter':
+            self._workbook.close()
+        else:
+            self._workbook.save(self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_excel(reviews, filename, chunk_size=2000, **kwargs):
+    """Stream reviews to an .xlsx file in normalized chunks; return the writer (for stats)"""
+    with StreamingExcelWriter(filename, **kwargs) as writer:
+        for start in range(0, len(reviews), chunk_size):
+            writer.write_reviews(reviews[start:start + chunk_size])
+    return writer
+
+
+def write_excel_frame(df, filename, **kwargs):
+    """Stream an already normalized frame to an .xlsx file; return the writer (for stats)"""
+    with StreamingExcelWriter(filename, **kwargs) as writer:
+        writer.write_frame(df)
+    return writer
+
+
+def write_csv(df, filename):
+    """Write a normalized frame to CSV (utf-8-sig so Excel shows German characters correctly)"""
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    df.to_csv(filename, index=False, encoding='utf-8-sig', date_format='%Y-%m-%d')
+
+
+def json_backend():
+    """Name of the JSON library used for encoding"""
+    return 'orjson' if orjson is not None else 'json'
+
+
+def encode_json(value, pretty=False):
+    """Encode one value as UTF-8 JSON bytes (non-ASCII characters are kept as-is)"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(value, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_json(reviews, filename, mode='pretty', chunk_size=2000, typed=False):
+    """Stream reviews to a JSON array (pretty or compact) or a JSON Lines file
+
+    Pass typed=True when the reviews already went through typed_reviews().
+    """
+    if mode not in JSON_MODES:
+        raise ValueError(f"Unknown JSON mode: {mode}")
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    pretty = mode == 'pretty'
+    with open(filename, 'wb') as f:
+        if mode != 'jsonl':
+            f.write(b'[')
+        first = True
+        for start in range(0, len(reviews), chunk_size):
+            chunk = reviews[start:start + chunk_size]
+            for review in (chunk if typed else typed_reviews(chunk)):
+                data = encode_json(review, pretty=pretty)
+                if mode == 'jsonl':
+                    f.write(data + b'\n')
+                    continue
+                if pretty:
+                    # Indent the item one level, like json.dump(..., indent=2) of the whole list
+                    # (JSON strings can't contain raw newlines, so every b'\n' is structural)
+                    data = b'\n  ' + data.replace(b'\n', b'\n  ')
+                f.write(data if first else b',' + data)
+                first = False
+        if mode != 'jsonl':
+            f.write(b'\n]' if pretty and not first else b']')
+
+
+def read_json(filename):
+    """Load reviews from a JSON array or JSON Lines file"""
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if filename.endswith('.jsonl'):
+        return [loads(line) for line in data.splitlines() if line.strip()]
+    return loads(data)
+
+
+def _export_format(fmt, data, filename, json_mode):
+    """Write one format from prepared data; runs in a worker (module level so it can be pickled)"""
+    start = time.perf_counter()
+    if fmt == 'json':
+        write_json(data, filename, mode=json_mode, typed=True)
+    elif fmt == 'csv':
+        write_csv(data, filename)
+    elif fmt == 'xlsx':
+        write_excel_frame(data, filename)
+    elif fmt == 'columnar':
+        write_columnar(data, filename)
+    elif fmt == 'sqlite':
+        store = ReviewStore(filename)
+        store.upsert_reviews(data)
+        store.close()
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return time.perf_counter() - start
+
+
+def _run_pool(executor, tasks, max_workers=None):
+    """Write every task in a thread or process pool; return {format: (filename, seconds)}"""
+    pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    timings = {}
+    with pool_class(max_workers=max_workers or len(tasks)) as pool:
+        futures = {fmt: pool.submit(_export_format, *task) for fmt, task in tasks.items()}
+        for fmt, future in futures.items():
+            timings[fmt] = (tasks[fmt][2], future.result())
+    return timings
+
+
+def export_all(reviews, folder, formats, json_mode='pretty', executor='thread', max_workers=None):
+    """Prepare reviews once and write all formats concurrently; return {format: (filename, seconds)}
+
+    executor is 'thread' (default), 'process' or 'serial'. Threads win while
+    one format (Excel) dominates; processes avoid the GIL when several slow
+    formats are requested, at the cost of pickling the prepared data.
+    """
+    os.makedirs(folder, exist_ok=True)
+    formats = [fmt for fmt in EXPORT_FILENAMES if fmt in formats]
+
+    # Prepare once: typed dicts for JSON/SQLite, a normalized frame for CSV/Excel/columnar
+    start = time.perf_counter()
+    typed = typed_reviews(reviews) if {'json', 'sqlite'} & set(formats) else None
+    frame = normalize_frame(reviews_to_frame(reviews)) if {'csv', 'xlsx', 'columnar'} & set(formats) else None
+    prepare_time = time.perf_counter() - start
+
+    tasks = {}
+    for fmt in formats:
+        filename = os.path.join(folder, EXPORT_FILENAMES[fmt])
+        if fmt == 'json' and json_mode == 'jsonl':
+            filename = os.path.join(folder, 'reviews.jsonl')
+        tasks[fmt] = (fmt, typed if fmt in ('json', 'sqlite') else frame, filename, json_mode)
+
+    timings = {}
+    if executor == 'serial' or len(tasks) < 2:
+        for fmt, task in tasks.items():
+            timings[fmt] = (task[2], _export_format(*task))
+    else:
+        try:
+            timings = _run_pool(executor, tasks, max_workers)
+        except (BrokenProcessPool, NotImplementedError) as e:
+            if executor != 'process':
+                raise
+            # e.g. no process support in the environment: fall back to threads.
+            # Errors of the writers themselves (disk full, file open in Excel) propagate as they are.
+            print(f"⚠ Process pool unavailable ({e}), exporting with threads instead")
+            executor = 'thread'
+            timings = _run_pool(executor, tasks, max_workers)
+
+    total = time.perf_counter() - start
+    print(f"Prepared {len(reviews)} reviews in {prepare_time:.2f}s")
+    for fmt, (filename, seconds) in timings.items():
+        print(f"  {fmt:<8} {seconds:6.2f}s  {filename}")
+    print(f"Exported {len(timings)} formats in {total:.2f}s ({executor})")
+    return timings
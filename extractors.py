@@ -0,0 +1,95 @@
+"""
+Registry of review extractor versions
+
+Every parser generation is registered under a name and exposed through the
+same interface: a factory returning extract(html) -> list of review dicts
+(html is a page source as str or bytes). v1 and v2 wrap the archived
+Checkpoint/scraperV1.py and scraperV2.py, v3 is the current KununuScraper,
+so all generations can be run side by side over the same pages.
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+
+from bs4 import BeautifulSoup
+
+
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Checkpoint')
+PLACEHOLDER_URL = 'http://extractor.invalid'
+
+EXTRACTORS = {}  # name -> (description, factory)
+
+
+def register(name, description):
+    """Register an extractor factory under a version name"""
+    def decorator(factory):
+        EXTRACTORS[name] = (description, factory)
+        return factory
+    return decorator
+
+
+def available_extractors():
+    """Return {name: description} of all registered versions"""
+    return {name: description for name, (description, _) in EXTRACTORS.items()}
+
+
+def get_extractor(name):
+    """Create a fresh extractor of the given version"""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}' (available: {', '.join(EXTRACTORS)})")
+    return EXTRACTORS[name][1]()
+
+
+def _load_checkpoint(module_name):
+    """Import an archived scraper module from Checkpoint/ without running its main()"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(CHECKPOINT_DIR, f"{module_name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _full_parse_extractor(scraper):
+    """Parse the whole page, find the review elements like the archived scrape_page_with_requests"""
+    def extract(html):
+        soup = BeautifulSoup(html, 'html.parser')
+        elements = soup.find_all('article') or soup.find_all('div', class_=lambda x: x and 'review' in str(x).lower())
+        if not elements:
+            elements = soup.find_all(attrs={'data-testid': lambda x: x and 'review' in str(x).lower()})
+        with contextlib.redirect_stdout(io.StringIO()):  # scrape_review reports every category
+            reviews = [scraper.scrape_review(element) for element in elements]
+        return [review for review in reviews if review['title']]
+    return extract
+
+
+def _checkpoint_extractor(module_name):
+    return _full_parse_extractor(_load_checkpoint(module_name).KununuScraper(PLACEHOLDER_URL, use_selenium=False))
+
+
+@register('v1', "Checkpoint/scraperV1.py: full parse, 'rating' spans, categories from the text after the label")
+def v1_extractor():
+    return _checkpoint_extractor('scraperV1')
+
+
+@register('v2', "Checkpoint/scraperV2.py: full parse, 'score' spans, category comments from h4 containers")
+def v2_extractor():
+    return _checkpoint_extractor('scraperV2')
+
+
+@register('v3-fullparse', "scraperV3.py scrape_review on a full BeautifulSoup parse (no strainers)")
+def v3_fullparse_extractor():
+    from scraperV3 import KununuScraper
+    return _full_parse_extractor(KununuScraper(PLACEHOLDER_URL, use_selenium=False))
+
+
+@register('v3', "scraperV3.py parse_page: review subtrees only (SoupStrainer), learned selector")
+def v3_extractor():
+    from scraperV3 import KununuScraper
+    scraper = KununuScraper(PLACEHOLDER_URL, use_selenium=False)
+
+    def extract(html):
+        with contextlib.redirect_stdout(io.StringIO()):
+            reviews = scraper.parse_page(html, 0, card_fallback=False)
+        return [review for review in reviews if review['title']]
+    return extract
@@ -0,0 +1,195 @@
+"""
+Hedged page fetches
+
+A fetch that has not answered within the hedge delay (a high percentile of
+the latencies of recent fetches) gets a second attempt, and whichever answers
+first is used. Hedges are limited by a rate budget (a share of all fetches
+plus a small burst), so a slow site never sees much more traffic than
+without hedging. LatencyHistogram keeps what the crawl actually waited per
+page, to compare p50/p95/p99 with and without hedging.
+
+One browser cannot run two navigations at once, so in Selenium mode a load
+slower than the hedge delay is stopped and issued again instead (within the
+same budget); without budget left the load is waited for in full.
+
+The hedge delay is learned only from fetches that were not hedged: a hedged
+fetch says nothing about one attempt's latency, and counting its slow loser
+would pull the delay up to the very tail it is meant to cut.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket takes everything slower
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty sequence of numbers"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyTracker:
+    def __init__(self, pct=95, window=100, min_samples=10, initial_delay=5.0, min_delay=0.05):
+        """The hedge delay: the pct percentile of the last window fetch latencies (initial_delay until min_samples)"""
+        self.pct = pct
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def hedge_delay(self):
+        samples = list(self.samples)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, percentile(samples, self.pct))
+
+
+class RateBudget:
+    def __init__(self, max_share=0.1, burst=2):
+        """Allow at most max_share extra requests per fetch, plus burst extra requests in total"""
+        self.max_share = max_share
+        self.burst = burst
+        self.fetches = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+
+    def count_fetch(self):
+        with self.lock:
+            self.fetches += 1
+
+    def try_hedge(self):
+        """Take one hedge from the budget; return False if none is left"""
+        with self.lock:
+            if self.hedges + 1 > self.max_share * self.fetches + self.burst:
+                return False
+            self.hedges += 1
+            return True
+
+
+class LatencyHistogram:
+    def __init__(self):
+        """Per-page latencies of a crawl"""
+        self.samples = []
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentiles(self):
+        """Return {'p50': s, 'p95': s, 'p99': s} (empty without samples)"""
+        if not self.samples:
+            return {}
+        return {f"p{pct}": percentile(self.samples, pct) for pct in (50, 95, 99)}
+
+    def counts(self):
+        """Return [(bucket label, count)]"""
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for seconds in self.samples:
+            counts[next((idx for idx, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound),
+                        len(LATENCY_BUCKETS))] += 1
+        labels = [f"≤{bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return list(zip(labels, counts))
+
+    def report(self, title="Page latency", width=40):
+        """Print the percentiles and a text histogram"""
+        if not self.samples:
+            return
+        stats = self.percentiles()
+        print(f"{title} ({len(self.samples)} fetches): "
+              + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stats.items())
+              + f", max {max(self.samples):.2f}s")
+        counts = self.counts()
+        most = max(count for _, count in counts)
+        # Only the buckets from the fastest to the slowest one in use
+        used = [idx for idx, (_, count) in enumerate(counts) if count]
+        for label, count in counts[used[0]:used[-1] + 1]:
+            print(f"  {label:>6} {count:>6}  {'█' * math.ceil(count / most * width) if count else ''}")
+
+
+class Hedger:
+    def __init__(self, tracker=None, budget=None, max_workers=8, load_timeout=60):
+        """Run fetches with a second attempt when the first is slower than tracker.hedge_delay()"""
+        self.tracker = tracker or LatencyTracker()
+        self.budget = budget or RateBudget()
+        self.load_timeout = load_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @staticmethod
+    def _timed(fetch):
+        start = time.perf_counter()
+        result = fetch()
+        return result, time.perf_counter() - start
+
+    def fetch(self, primary, hedge):
+        """Return primary(), or hedge() if the hedge started after the delay answers first
+
+        The slower attempt is left to finish in the background; an attempt that
+        raises only counts when the other one fails too.
+        """
+        self.budget.count_fetch()
+        first = self.executor.submit(self._timed, primary)
+        done, _ = wait([first], timeout=self.tracker.hedge_delay())
+        if done or not self.budget.try_hedge():
+            result, seconds = first.result()
+            self.tracker.record(seconds)
+            return result
+
+        self.hedged += 1
+        second = self.executor.submit(self._timed, hedge)
+        pending, error = {first, second}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.hedge_wins += future is second
+                    return future.result()[0]
+                error = error or future.exception()
+        raise error
+
+    def load(self, driver, url):
+        """driver.get(url); a load slower than the hedge delay is stopped and issued again (within the budget)
+
+        Without budget left the first load is waited for up to load_timeout, so
+        the page is complete when this returns and its real load time is learned.
+        """
+        self.budget.count_fetch()
+        start = time.perf_counter()
+        driver.set_page_load_timeout(max(self.tracker.hedge_delay(), 1))
+        try:
+            driver.get(url)
+        except TimeoutException:
+            driver.set_page_load_timeout(self.load_timeout)
+            if self.budget.try_hedge():
+                self.hedged += 1
+                driver.execute_script("window.stop();")
+                driver.get(url)
+                return
+            WebDriverWait(driver, self.load_timeout).until(
+                lambda d: d.execute_script("return document.readyState") == 'complete')
+        finally:
+            driver.set_page_load_timeout(self.load_timeout)
+        self.tracker.record(time.perf_counter() - start)
+
+    def close(self):
+        """Stop the hedge threads; attempts still running are not waited for"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def report(self):
+        if self.budget.fetches:
+            print(f"Hedged {self.hedged} of {self.budget.fetches} fetches"
+                  + (f" ({self.hedge_wins} answered first by the hedge)" if self.hedge_wins else "")
+                  + f", hedge delay now {self.tracker.hedge_delay():.2f}s (p{self.tracker.pct})")
@@ -0,0 +1,266 @@
+"""
+Per-page network traces for Selenium mode
+
+Chrome records every DevTools network event in its performance log when the
+driver is started with goog:loggingPrefs {'performance': 'ALL'}. After each
+page the events are turned into one record per request (URL, domain, type,
+status, bytes, timing phases). Pages slower than a threshold are written as
+HAR 1.2 files (open them in the browser's network panel), and all pages feed
+a summary of the slowest resources and of the time spent per domain, which
+shows the third-party resources worth blocking and the waits worth shortening.
+"""
+
+import json
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+
+SUMMARY_FILE = 'network_summary.json'
+
+# Timing phases of a HAR entry, from the DevTools ResourceTiming fields (milliseconds)
+TIMING_PHASES = [
+    ('blocked', None, 'dnsStart'),
+    ('dns', 'dnsStart', 'dnsEnd'),
+    ('connect', 'connectStart', 'connectEnd'),
+    ('ssl', 'sslStart', 'sslEnd'),
+    ('send', 'sendStart', 'sendEnd'),
+    ('wait', 'sendEnd', 'receiveHeadersEnd'),
+]
+
+
+def enable_performance_log(chrome_options):
+    """Make Chrome record network events in the driver's performance log"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def read_events(driver):
+    """Return the DevTools events logged since the last call, as (method, params)"""
+    events = []
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message.get('method', '').startswith(('Network.', 'Page.')):
+            events.append((message['method'], message.get('params', {})))
+    return events
+
+
+def site_domain(url):
+    """Registrable-looking domain of a URL (last two host labels), used to tell first from third parties"""
+    host = urlsplit(url).hostname or ''
+    return '.'.join(host.split('.')[-2:])
+
+
+def requests_from_events(events):
+    """Turn DevTools network events into (one dict per request in the order they were sent, page load ms)"""
+    requests = {}
+    page_loaded = None
+    for method, params in events:
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent':
+            request = requests.get(request_id)
+            if request is None or params.get('redirectResponse') is None:
+                request = requests[request_id] = {
+                    'start': params['timestamp'],
+                    'wall_time': params.get('wallTime'),
+                    'method': params['request'].get('method', 'GET'),
+                    'type': params.get('type', 'Other'),
+                    'request_headers': params['request'].get('headers', {}),
+                    'status': None, 'status_text': '', 'protocol': '', 'mime_type': '',
+                    'response_headers': {}, 'timing': None, 'bytes': 0, 'error': None, 'end': None,
+                }
+            # A redirect keeps the request id: the entry follows it to the final URL
+            request['url'] = params['request']['url']
+        elif request_id not in requests:
+            if method == 'Page.loadEventFired':
+                page_loaded = params.get('timestamp')
+            continue
+        elif method == 'Network.responseReceived':
+            response = params['response']
+            requests[request_id].update(
+                status=response.get('status'), status_text=response.get('statusText', ''),
+                protocol=response.get('protocol', ''), mime_type=response.get('mimeType', ''),
+                response_headers=response.get('headers', {}), timing=response.get('timing'),
+                type=params.get('type', requests[request_id]['type']),
+            )
+        elif method == 'Network.loadingFinished':
+            requests[request_id].update(end=params['timestamp'], bytes=params.get('encodedDataLength', 0))
+        elif method == 'Network.loadingFailed':
+            requests[request_id].update(end=params['timestamp'], error=params.get('errorText', 'failed'))
+
+    records = sorted(requests.values(), key=lambda request: request['start'])
+    origin = records[0]['start'] if records else 0.0
+    for record in records:
+        record['domain'] = urlsplit(record['url']).hostname or ''
+        record['offset_ms'] = (record['start'] - origin) * 1000
+        # Requests still open when the page was done have no end: they count as unfinished
+        record['duration_ms'] = (record['end'] - record['start']) * 1000 if record['end'] else None
+    page_load_ms = (page_loaded - origin) * 1000 if records and page_loaded else None
+    return records, page_load_ms
+
+
+def _har_headers(headers):
+    return [{'name': name, 'value': str(value)} for name, value in headers.items()]
+
+
+def _har_timings(request):
+    """HAR timings (ms, -1 = not applicable); 'receive' is whatever follows the response headers"""
+    timing = request['timing'] or {}
+    timings = {}
+    for phase, start, end in TIMING_PHASES:
+        begin = 0.0 if start is None else timing.get(start, -1)
+        finish = timing.get(end, -1)
+        timings[phase] = round(finish - begin, 3) if begin >= 0 and finish >= 0 else -1
+    total = request['duration_ms'] or 0.0
+    if timing:
+        # Time from requestWillBeSent to requestTime (queueing in the browser) is also 'blocked'
+        queued = (timing.get('requestTime', request['start']) - request['start']) * 1000
+        timings['blocked'] = round(max(timings['blocked'], 0) + max(queued, 0), 3)
+        headers_end = queued + max(timing.get('receiveHeadersEnd', 0), 0)
+        timings['receive'] = round(max(total - headers_end, 0), 3)
+    else:
+        timings.update(blocked=-1, send=0, wait=round(total, 3), receive=0)
+    return timings
+
+
+def to_har(records, page_url, page_id='page_1', page_load_ms=None):
+    """HAR 1.2 document of one page's requests"""
+    started = records[0]['wall_time'] if records and records[0]['wall_time'] else datetime.now().timestamp()
+    entries = []
+    for record in records:
+        wall_time = started + record['offset_ms'] / 1000
+        query = urlsplit(record['url']).query
+        entries.append({
+            'pageref': page_id,
+            'startedDateTime': datetime.fromtimestamp(wall_time, timezone.utc).isoformat(),
+            'time': round(record['duration_ms'] or 0.0, 3),
+            'request': {
+                'method': record['method'], 'url': record['url'], 'httpVersion': record['protocol'],
+                'headers': _har_headers(record['request_headers']), 'cookies': [],
+                'queryString': [{'name': name, 'value': value} for name, _, value in
+                                (part.partition('=') for part in query.split('&') if part)],
+                'headersSize': -1, 'bodySize': -1,
+            },
+            'response': {
+                'status': record['status'] or 0, 'statusText': record['status_text'] or (record['error'] or ''),
+                'httpVersion': record['protocol'], 'headers': _har_headers(record['response_headers']),
+                'cookies': [], 'content': {'size': record['bytes'], 'mimeType': record['mime_type']},
+                'redirectURL': '', 'headersSize': -1, 'bodySize': record['bytes'],
+            },
+            'cache': {},
+            'timings': _har_timings(record),
+            '_resourceType': record['type'],
+        })
+    return {'log': {
+        'version': '1.2',
+        'creator': {'name': 'kununu-scraper', 'version': '3'},
+        'pages': [{
+            'id': page_id, 'title': page_url,
+            'startedDateTime': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            'pageTimings': {'onContentLoad': -1, 'onLoad': round(page_load_ms, 3) if page_load_ms else -1},
+        }],
+        'entries': entries,
+    }}
+
+
+class NetworkTracer:
+    def __init__(self, folder, threshold_seconds=20, top=20):
+        """Trace every page, write HAR files of pages slower than threshold_seconds into folder"""
+        self.folder = folder
+        self.threshold_seconds = threshold_seconds
+        self.top = top
+        self.first_party = None
+        self.pages = []              # [{page_num, url, seconds, requests, har}]
+        self.slowest = []            # the top slowest requests of all pages
+        self.domains = defaultdict(lambda: {'requests': 0, 'failed': 0, 'unfinished': 0, 'bytes': 0,
+                                            'total_ms': 0.0, 'max_ms': 0.0, 'slow_pages': 0})
+
+    def begin(self, driver):
+        """Discard events logged before the page starts loading"""
+        read_events(driver)
+
+    def end(self, driver, page_num, url, seconds, status=None):
+        """Collect the page's requests; write its HAR file if it was slow; return the page record"""
+        records, page_load_ms = requests_from_events(read_events(driver))
+        if self.first_party is None:
+            self.first_party = site_domain(url)
+        slow = seconds >= self.threshold_seconds
+        page = {'page_num': page_num, 'url': url, 'seconds': round(seconds, 2), 'status': status,
+                'requests': len(records), 'bytes': sum(record['bytes'] for record in records), 'har': None}
+
+        for record in records:
+            stats = self.domains[record['domain']]
+            stats['requests'] += 1
+            stats['bytes'] += record['bytes']
+            stats['failed'] += record['error'] is not None
+            if record['duration_ms'] is None:
+                stats['unfinished'] += 1
+                continue
+            stats['total_ms'] += record['duration_ms']
+            stats['max_ms'] = max(stats['max_ms'], record['duration_ms'])
+            self.slowest.append({'page_num': page_num, 'url': record['url'], 'domain': record['domain'],
+                                 'type': record['type'], 'status': record['status'], 'error': record['error'],
+                                 'ms': round(record['duration_ms'], 1), 'bytes': record['bytes']})
+        if slow:
+            for domain in {record['domain'] for record in records}:
+                self.domains[domain]['slow_pages'] += 1
+            page['har'] = self.write_har(records, page_num, url, page_load_ms)
+            print(f"Page {page_num} took {seconds:.1f}s: network trace written to {page['har']}")
+        self.slowest = sorted(self.slowest, key=lambda record: record['ms'], reverse=True)[:self.top]
+        self.pages.append(page)
+        return page
+
+    def write_har(self, records, page_num, url, page_load_ms=None):
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, f"page_{page_num}_{datetime.now().strftime('%H%M%S')}.har")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(to_har(records, url, f"page_{page_num}", page_load_ms), f, ensure_ascii=False)
+        return path
+
+    def summary(self):
+        """Slowest pages, slowest resources and time per domain (third parties marked)"""
+        domains = []
+        for domain, stats in self.domains.items():
+            finished = stats['requests'] - stats['unfinished']
+            domains.append(dict(domain=domain, third_party=site_domain(f"//{domain}") != self.first_party,
+                                mean_ms=round(stats['total_ms'] / finished, 1) if finished else None,
+                                **{key: round(value, 1) if isinstance(value, float) else value
+                                   for key, value in stats.items()}))
+        domains.sort(key=lambda stats: stats['total_ms'], reverse=True)
+        return {
+            'threshold_seconds': self.threshold_seconds,
+            'pages_traced': len(self.pages),
+            'slow_pages': [page for page in sorted(self.pages, key=lambda page: page['seconds'], reverse=True)
+                           if page['har']],
+            'slowest_resources': self.slowest,
+            'domains': domains,
+        }
+
+    def write_summary(self):
+        """Write network_summary.json into the trace folder and print the highlights; return its path"""
+        if not self.pages:
+            return None
+        summary = self.summary()
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, SUMMARY_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        print(f"\nNetwork trace: {summary['pages_traced']} pages, {len(summary['slow_pages'])} slower than "
+              f"{self.threshold_seconds}s")
+        print(f"  {'domain':<40} {'requests':>8} {'total s':>8} {'max ms':>8} {'MB':>6}")
+        for stats in summary['domains'][:10]:
+            marker = '*' if stats['third_party'] else ' '
+            print(f" {marker}{stats['domain'][:40]:<40} {stats['requests']:>8} {stats['total_ms'] / 1000:>8.1f} "
+                  f"{stats['max_ms']:>8.0f} {stats['bytes'] / 2**20:>6.1f}")
+        print("  (* = third party)")
+        for record in summary['slowest_resources'][:5]:
+            print(f"  {record['ms']:>8.0f} ms  page {record['page_num']}  {shorten(record['url'])}")
+        print(f"Summary written to {path}")
+        return path
+
+
+def shorten(url, width=90):
+    url = re.sub(r'^https?://', '', url)
+    return url if len(url) <= width else url[:width - 3] + '...'
@@ -0,0 +1,160 @@
+"""
+Typed normalization of scraped reviews
+
+The scraper keeps the site's text as-is ("Oktober 2025", "2,2", "4").
+This module converts those columns once, vectorized with pandas, so every
+exporter writes real dates, floats and small integers.
+"""
+
+import pandas as pd
+
+from review_identity import review_identity
+
+
+# The 13 category ratings Kununu shows on a review
+CATEGORIES = [
+    'Arbeitsatmosphäre', 'Image', 'Work-Life-Balance',
+    'Karriere/Weiterbildung', 'Gehalt/Sozialleistungen',
+    'Umwelt-/Sozialbewusstsein', 'Kollegenzusammenhalt',
+    'Umgang mit älteren Kollegen', 'Vorgesetztenverhalten',
+    'Arbeitsbedingungen', 'Kommunikation', 'Gleichberechtigung',
+    'Interessante Aufgaben'
+]
+
+GERMAN_MONTHS = {
+    'Januar': 1, 'Februar': 2, 'März': 3, 'April': 4, 'Mai': 5, 'Juni': 6,
+    'Juli': 7, 'August': 8, 'September': 9, 'Oktober': 10, 'November': 11, 'Dezember': 12,
+}
+
+RECOMMENDATIONS = {'Empfohlen': True, 'Nicht empfohlen': False}
+
+BASE_COLUMNS = ['review_id', 'title', 'rating', 'recommendation', 'date', 'position',
+                'department', 'location', 'pros', 'cons', 'suggestions']
+# Fixed column order of a normalized flat review (for writers that need the header upfront)
+EXPORT_COLUMNS = (['review_id', 'title', 'rating', 'recommendation', 'recommended', 'date', 'review_month',
+                   'position', 'department', 'location', 'pros', 'cons', 'suggestions']
+                  + [f"{category}_comment" for category in CATEGORIES]
+                  + [f"{category}_rating" for category in CATEGORIES])
+
+
+def flatten_review(review):
+    """Flatten the nested category dictionaries of a review into one row"""
+    flat_review = {column: review.get(column, '') for column in BASE_COLUMNS}
+    flat_review['review_id'] = review_identity(review)
+    # Add category text comments as separate columns
+    for cat_name, cat_value in (review.get('categories') or {}).items():
+        flat_review[f"{cat_name}_comment"] = cat_value
+    # Add category ratings as separate columns with '_rating' suffix
+    for cat_name, cat_rating in (review.get('category_ratings') or {}).items():
+        flat_review[f"{cat_name}_rating"] = cat_rating
+    return flat_review
+
+
+def reviews_to_frame(reviews):
+    """Build a flat DataFrame (one row per review) from scraped review dicts"""
+    return pd.DataFrame([flatten_review(review) for review in reviews])
+
+
+def _parse_uniques(values, parser):
+    """Apply a vectorized parser to the distinct values only, then broadcast back
+
+    Dates and ratings repeat heavily (a few hundred month-years, ~40 rating
+    values), so parsing the uniques and indexing with the factorized codes is
+    much cheaper than parsing every row.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parsed = parser(pd.Series(uniques, dtype=object))
+    # Append one missing value for the NA sentinel (-1 indexes the last element)
+    parsed = pd.concat([parsed, pd.Series([None], dtype=parsed.dtype)], ignore_index=True)
+    return pd.Series(parsed.to_numpy()[codes], index=values.index, dtype=parsed.dtype)
+
+
+def _month_year(dates):
+    parts = dates.astype('string').str.extract(r'(?P<month>[A-Za-zÄÖÜäöü]+)\s+(?P<year>\d{4})')
+    month = parts['month'].map(GERMAN_MONTHS).astype('float64')
+    year = pd.to_numeric(parts['year'], errors='coerce').astype('float64')
+    return pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': 1}), errors='coerce')
+
+
+def _decimal_comma(values):
+    text = values.astype('string').str.strip().str.replace(',', '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype('float64')
+
+
+def _small_int(values):
+    numbers = pd.to_numeric(values.astype('string'), errors='coerce').astype('float64')
+    return numbers.where((numbers >= 1) & (numbers <= 5) & (numbers % 1 == 0))
+
+
+def parse_month_year(dates):
+    """Vectorized parse of German month-year text ("Oktober 2025") to the first day of that month"""
+    return _parse_uniques(dates, _month_year)
+
+
+def parse_decimal_comma(values):
+    """Vectorized parse of decimal-comma text ("2,2") to floats; blanks become NaN"""
+    return _parse_uniques(values, _decimal_comma)
+
+
+def parse_small_int(values):
+    """Vectorized parse of 1-5 star ratings to nullable Int8"""
+    return _parse_uniques(values, _small_int).astype('Int8')
+
+
+def normalize_frame(df):
+    """Convert the text columns of a flat review DataFrame to typed columns (returns a new frame)"""
+    df = df.copy()
+    if 'rating' in df:
+        df['rating'] = parse_decimal_comma(df['rating']).astype('float32')
+    if 'recommendation' in df:
+        recommended = df['recommendation'].astype('string').str.strip().map(RECOMMENDATIONS)
+        df.insert(df.columns.get_loc('recommendation') + 1, 'recommended', recommended.astype('boolean'))
+    if 'date' in df:
+        df.insert(df.columns.get_loc('date') + 1, 'review_month', parse_month_year(df['date']))
+    for column in df.columns:
+        if column.endswith('_rating'):
+            df[column] = parse_small_int(df[column])
+    return df
+
+
+def typed_reviews(reviews):
+    """Return copies of the review dicts with typed rating, month and category ratings (for JSON)"""
+    if not reviews:
+        return []
+    df = normalize_frame(pd.DataFrame({
+        'rating': [review.get('rating', '') for review in reviews],
+        'recommendation': [review.get('recommendation', '') for review in reviews],
+        'date': [review.get('date', '') for review in reviews],
+    }))
+    ratings = df['rating'].astype(object).where(df['rating'].notna(), None).tolist()
+    recommended = df['recommended'].astype(object).where(df['recommended'].notna(), None).tolist()
+    months = df['review_month'].dt.strftime('%Y-%m-%d').astype(object)
+    months = months.where(df['review_month'].notna(), None).tolist()
+
+    typed = []
+    for review, rating, is_recommended, month in zip(reviews, ratings, recommended, months):
+        typed_review = {}
+        for key, value in review.items():
+            if key in ('recommended', 'review_month'):
+                continue  # re-derived below (input may already be typed)
+            typed_review[key] = value
+            # Keep each typed column next to the text it was parsed from
+            if key == 'recommendation':
+                typed_review['recommended'] = is_recommended
+            elif key == 'date':
+                typed_review['review_month'] = month
+        typed_review['rating'] = None if rating is None else round(float(rating), 2)
+        typed_review.setdefault('recommended', is_recommended)
+        typed_review.setdefault('review_month', month)
+        category_ratings = {}
+        for category, value in (review.get('category_ratings') or {}).items():
+            if type(value) is not int:  # older exports stored the stars as text
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    continue
+            if 1 <= value <= 5:
+                category_ratings[category] = value
+        typed_review['category_ratings'] = category_ratings
+        typed.append(typed_review)
+    return typed
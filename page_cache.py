@@ -0,0 +1,73 @@
+"""
+Fingerprint cache of parsed listing pages
+
+Each page's review region (from the first <article> to the last </article>)
+is hashed without parsing the HTML. Parsed review records are stored in
+SQLite under that fingerprint, so a page whose reviews haven't changed since
+the last run is served from the cache and BeautifulSoup is never invoked.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+def review_region(html):
+    """Return the part of the page (str or bytes) that holds the reviews, or the whole page if no <article> is found"""
+    open_tag, close_tag = ('<article', '</article>') if isinstance(html, str) else (b'<article', b'</article>')
+    start = html.find(open_tag)
+    end = html.rfind(close_tag)
+    if start == -1 or end == -1 or end < start:
+        return html
+    return html[start:end + len(close_tag)]
+
+
+def page_fingerprint(html):
+    """Hash a page's review region (html is the page source as str or raw response bytes)"""
+    region = review_region(html)
+    if isinstance(region, str):
+        region = region.encode('utf-8')
+    return hashlib.blake2b(region, digest_size=16).hexdigest()
+
+
+class ParseCache:
+    def __init__(self, db_path='outputs/parse_cache.db'):
+        """Parsed review records keyed by page fingerprint"""
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                fingerprint TEXT PRIMARY KEY,
+                page_num INTEGER,
+                reviews TEXT NOT NULL,
+                updated_at REAL
+            )
+        """)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint):
+        """Return the cached records for a fingerprint, or None"""
+        row = self.conn.execute("SELECT reviews FROM pages WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, fingerprint, page_num, reviews):
+        """Store the parsed records of a page"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (fingerprint, page_num, reviews, updated_at) VALUES (?, ?, ?, ?)",
+                (fingerprint, page_num, json.dumps(reviews, ensure_ascii=False), time.time())
+            )
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
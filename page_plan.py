@@ -0,0 +1,83 @@
+"""
+Upfront page planning from the listing's total review count
+
+The listing shows how many reviews exist (structured data "reviewCount" or a
+visible "12.569 Bewertungen"). Together with the number of reviews on a full
+page this gives the exact page set of the crawl, so the crawl can report
+progress and an ETA, stop at the real last page instead of probing for an
+empty one, and tell afterwards which planned pages are missing or came back
+short.
+"""
+
+import html as html_lib
+import re
+import time
+
+
+# Structured data first (exact), then the visible count next to "Bewertungen"/"Reviews"
+STRUCTURED_COUNT = re.compile(r'"(?:reviewCount|ratingCount)"\s*:\s*"?(\d+)')
+VISIBLE_COUNT = re.compile(r'(\d{1,3}(?:[.,\u00a0\u202f ]\d{3})+|\d+)\s*(?:Bewertungen|Erfahrungsberichte|Reviews)\b',
+                           re.IGNORECASE)
+TAG = re.compile(r'<[^>]+>')
+
+# Reviews on a full listing page; a first page with fewer reviews may be the last one
+REVIEWS_PER_PAGE = 10
+
+
+def find_total_reviews(page_html):
+    """Return the total review count a listing page shows, or None"""
+    if isinstance(page_html, bytes):
+        page_html = page_html.decode('utf-8', errors='replace')
+    counts = [int(count) for count in STRUCTURED_COUNT.findall(page_html)]
+    if not counts:
+        text = html_lib.unescape(TAG.sub(' ', page_html))
+        counts = [int(re.sub(r'\D', '', count)) for count in VISIBLE_COUNT.findall(text)]
+    # The company's own count is the largest one on its listing
+    return max(counts) if counts else None
+
+
+class CrawlPlan:
+    def __init__(self, total_reviews, per_page=REVIEWS_PER_PAGE, pages=None, start_page=1):
+        """The pages that exist for total_reviews at per_page per page: the given ones, or start_page..last"""
+        self.total_reviews = total_reviews
+        self.per_page = per_page
+        self.last_page = max(1, -(-total_reviews // per_page))
+        if pages is None:
+            pages = range(start_page, self.last_page + 1)
+        self.pages = sorted(page_num for page_num in set(pages) if page_num <= self.last_page)
+        self.settled = set()
+        self.started_at = time.time()
+
+    def expected_count(self, page_num):
+        """Reviews expected on a page: per_page, fewer on the last page, none past it"""
+        if page_num > self.last_page:
+            return 0
+        if page_num == self.last_page:
+            return self.total_reviews - (self.last_page - 1) * self.per_page
+        return self.per_page
+
+    @property
+    def expected_reviews(self):
+        return sum(self.expected_count(page_num) for page_num in self.pages)
+
+    def settle(self, page_num):
+        """Mark a page as done (scraped or given up)"""
+        if page_num in self.pages:
+            self.settled.add(page_num)
+
+    def progress(self, reviews_collected):
+        """One line of progress with the ETA from the average time per settled page"""
+        done, total = len(self.settled), len(self.pages)
+        line = f"Progress: {done}/{total} pages ({done / max(total, 1):.0%}), {reviews_collected}/{self.expected_reviews} reviews"
+        if done and done < total:
+            elapsed = time.time() - self.started_at
+            eta = elapsed / done * (total - done)
+            line += f", ETA {int(eta // 3600):d}:{int(eta % 3600 // 60):02d}:{int(eta % 60):02d}"
+        return line
+
+    def check(self, page_counts):
+        """Return (planned pages never scraped, {page: (found, expected)} for pages that came back short)"""
+        missing = [page_num for page_num in self.pages if page_num not in page_counts]
+        short = {page_num: (page_counts[page_num], self.expected_count(page_num)) for page_num in self.pages
+                 if page_num in page_counts and page_counts[page_num] < self.expected_count(page_num)}
+        return missing, short
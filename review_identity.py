@@ -0,0 +1,114 @@
+"""
+Stable review identities and a deduplication index
+
+A review is identified by the site's own review ID when the markup exposes
+one, otherwise by a hash of its normalized content. The DedupIndex keeps the
+identities seen so far in a set (optionally persisted to SQLite), so
+duplicates can be dropped during a crawl, across runs and when merging.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import unicodedata
+
+
+# Fields that make up a review's content hash (the overall rating is left out
+# on purpose: it is the field most likely to change with parser fixes)
+IDENTITY_FIELDS = ('title', 'date', 'recommendation', 'position', 'pros', 'cons', 'suggestions')
+
+UUID_PATTERN = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Identities of reviews without a site review ID start with this
+CONTENT_HASH_PREFIX = 'sha1:'
+
+
+def normalize_text(value):
+    """Normalize text for hashing: unicode form, case and whitespace"""
+    value = unicodedata.normalize('NFKC', str(value or ''))
+    return WHITESPACE_PATTERN.sub(' ', value).strip().casefold()
+
+
+def content_hash(review):
+    """Hash the normalized content of a review"""
+    parts = [normalize_text(review.get(field, '')) for field in IDENTITY_FIELDS]
+    for category, comment in sorted((review.get('categories') or {}).items()):
+        parts.append(f"{normalize_text(category)}={normalize_text(comment)}")
+    digest = hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+    return f"{CONTENT_HASH_PREFIX}{digest}"
+
+
+def find_site_review_id(review_element):
+    """Return the site's review ID from a review element (BeautifulSoup tag), or '' if there is none"""
+    for attr in ('data-review-id', 'data-review-uuid', 'data-id', 'id'):
+        value = review_element.get(attr)
+        if value:
+            match = UUID_PATTERN.search(str(value))
+            if match:
+                return match.group(0).lower()
+    # Permalinks to a single review contain its UUID
+    for link in review_element.find_all('a', href=True):
+        match = UUID_PATTERN.search(link['href'])
+        if match:
+            return match.group(0).lower()
+    return ''
+
+
+def review_identity(review):
+    """Return the stable identity of a review dict"""
+    review_id = review.get('review_id')
+    if review_id:
+        return review_id
+    return content_hash(review)
+
+
+class DedupIndex:
+    def __init__(self, path=None):
+        """Set of seen review identities, persisted to a SQLite file when path is given"""
+        self.path = path
+        self.conn = None
+        self.seen = set()
+        if path:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS seen (identity TEXT PRIMARY KEY)")
+            self.seen.update(row[0] for row in self.conn.execute("SELECT identity FROM seen"))
+        self._pending = []
+
+    def __contains__(self, identity):
+        return identity in self.seen
+
+    def __len__(self):
+        return len(self.seen)
+
+    def add(self, identity):
+        """Add an identity; return True if it was new"""
+        if identity in self.seen:
+            return False
+        self.seen.add(identity)
+        if self.conn is not None:
+            self._pending.append((identity,))
+            if len(self._pending) >= 500:
+                self.flush()
+        return True
+
+    def add_review(self, review):
+        """Add a review's identity; return True if the review was not seen before"""
+        return self.add(review_identity(review))
+
+    def flush(self):
+        """Write newly added identities to disk"""
+        if self.conn is not None and self._pending:
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO seen (identity) VALUES (?)", self._pending)
+            self._pending = []
+
+    def close(self):
+        """Flush and close the on-disk store"""
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
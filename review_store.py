@@ -0,0 +1,176 @@
+"""
+SQLite review store with full-text search
+
+Reviews go into a normalized schema (one row per review, one row per
+category rating/comment) with B-tree indexes on the columns analysts filter
+on, plus an FTS5 index over every free-text field. Inserts are batched in a
+single transaction and are upserts, so the same store can be fed
+incrementally from every run.
+"""
+
+import os
+import re
+import sqlite3
+
+from normalize import typed_reviews
+from review_identity import review_identity
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    rating REAL,
+    recommendation TEXT,
+    recommended INTEGER,
+    date TEXT,
+    review_month TEXT,
+    position TEXT,
+    department TEXT,
+    location TEXT,
+    pros TEXT,
+    cons TEXT,
+    suggestions TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_month ON reviews (review_month);
+CREATE INDEX IF NOT EXISTS idx_reviews_recommended ON reviews (recommended, review_month);
+CREATE INDEX IF NOT EXISTS idx_reviews_position ON reviews (position);
+
+CREATE TABLE IF NOT EXISTS category_ratings (
+    review_id TEXT NOT NULL REFERENCES reviews (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    rating INTEGER,
+    comment TEXT,
+    PRIMARY KEY (review_id, category)
+);
+CREATE INDEX IF NOT EXISTS idx_category_ratings ON category_ratings (category, rating);
+
+-- rowid of reviews_fts = rowid of reviews
+CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5 (
+    title, pros, cons, suggestions, comments,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+REVIEW_COLUMNS = ['id', 'title', 'rating', 'recommendation', 'recommended', 'date', 'review_month',
+                  'position', 'department', 'location', 'pros', 'cons', 'suggestions']
+
+# Query tokens: "quoted phrases", parentheses, everything else up to whitespace
+QUERY_TOKEN = re.compile(r'"(?:[^"]|"")*"|[()]|[^\s()"]+')
+FTS_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def fts_query(query):
+    """Turn a user query into FTS5 syntax: bare terms with punctuation become phrases
+
+    'Work-Life-Balance' would otherwise be read as a column filter; operators,
+    parentheses, quoted phrases and prefix terms (gehalt*) keep their meaning.
+    """
+    parts = []
+    for token in QUERY_TOKEN.findall(query):
+        if token in FTS_OPERATORS or token in '()' or token.startswith('"') or re.fullmatch(r'\w+\*?', token):
+            parts.append(token)
+        else:
+            prefix = token.endswith('*') and len(token) > 1
+            term = token[:-1] if prefix else token
+            parts.append('"' + term.replace('"', '""') + '"' + (' *' if prefix else ''))
+    return ' '.join(parts)
+
+
+class ReviewStore:
+    def __init__(self, db_path='outputs/reviews.db'):
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def upsert_reviews(self, reviews):
+        """Insert or update reviews (and their category rows and search index) in one transaction"""
+        review_rows = []
+        category_rows = []
+        for review in typed_reviews(reviews):
+            review_id = review_identity(review)
+            row = dict(review, id=review_id)
+            if row['recommended'] is not None:
+                row['recommended'] = int(row['recommended'])
+            review_rows.append(tuple(row.get(column) for column in REVIEW_COLUMNS))
+            comments = review.get('categories') or {}
+            ratings = review.get('category_ratings') or {}
+            for category in dict.fromkeys(list(comments) + list(ratings)):
+                category_rows.append((review_id, category, ratings.get(category), comments.get(category)))
+        if not review_rows:
+            return 0
+
+        placeholders = ', '.join('?' for _ in REVIEW_COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in REVIEW_COLUMNS[1:])
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_ids (id TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM batch_ids")
+            self.conn.executemany("INSERT OR IGNORE INTO batch_ids (id) VALUES (?)",
+                                  [(row[0],) for row in review_rows])
+            self.conn.executemany(
+                f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                review_rows
+            )
+            # Replace category rows and index entries of every review in the batch
+            self.conn.execute("DELETE FROM category_ratings WHERE review_id IN (SELECT id FROM batch_ids)")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO category_ratings (review_id, category, rating, comment) VALUES (?, ?, ?, ?)",
+                category_rows
+            )
+            self.conn.execute(
+                "DELETE FROM reviews_fts WHERE rowid IN "
+                "(SELECT rowid FROM reviews WHERE id IN (SELECT id FROM batch_ids))"
+            )
+            self.conn.execute("""
+                INSERT INTO reviews_fts (rowid, title, pros, cons, suggestions, comments)
+                SELECT r.rowid, r.title, r.pros, r.cons, r.suggestions,
+                       (SELECT group_concat(c.comment, ' ') FROM category_ratings c
+                        WHERE c.review_id = r.id AND c.comment IS NOT NULL)
+                FROM reviews r WHERE r.id IN (SELECT id FROM batch_ids)
+            """)
+        return len(review_rows)
+
+    def search(self, query, limit=20, month_from=None, month_to=None, recommended=None):
+        """Full-text search over titles, pros, cons, suggestions and category comments (FTS5 syntax, see fts_query)
+
+        Results are ranked by bm25; month bounds are 'YYYY-MM' or 'YYYY-MM-DD'.
+        """
+        sql = """
+            SELECT r.id, r.title, r.review_month, r.recommendation, r.rating,
+                   snippet(reviews_fts, -1, '[', ']', '…', 12) AS snippet
+            FROM reviews_fts JOIN reviews r ON r.rowid = reviews_fts.rowid
+            WHERE reviews_fts MATCH ?
+        """
+        params = [fts_query(query)]
+        # review_month is stored as YYYY-MM-DD; accept YYYY-MM bounds as whole months
+        if month_from and len(month_from) == 7:
+            month_from += '-01'
+        if month_to and len(month_to) == 7:
+            month_to += '-31'
+        if month_from:
+            sql += " AND r.review_month >= ?"
+            params.append(month_from)
+        if month_to:
+            sql += " AND r.review_month <= ?"
+            params.append(month_to)
+        if recommended is not None:
+            sql += " AND r.recommended = ?"
+            params.append(int(recommended))
+        sql += " ORDER BY bm25(reviews_fts) LIMIT ?"
+        params.append(limit)
+        columns = ['id', 'title', 'review_month', 'recommendation', 'rating', 'snippet']
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def count(self):
+        """Return the number of stored reviews"""
+        return self.conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
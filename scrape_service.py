@@ -0,0 +1,355 @@
+"""
+Long-running scrape service with a pool of warm scrapers
+
+Every scraper of the pool is started once (Chrome, ChromeDriver, cookie
+banner, keep-alive HTTP session) and reused for all jobs, so small ad-hoc
+scrapes skip the cold start. Jobs come in through a local HTTP/JSON API and
+their results are streamed back page by page as JSON Lines:
+
+  POST /jobs              {"company": "deutsche-post", "start_page": 1, "end_page": 3,
+                           "formats": ["json"], "stream": true}
+  GET  /jobs              all jobs and their status
+  GET  /jobs/<id>         status of one job
+  GET  /jobs/<id>/stream  the job's events as JSON Lines (replayed, then followed live)
+  GET  /jobs/<id>/reviews all reviews of the job
+  GET  /health            pool size and free scrapers
+
+Stream events: {"event": "page", "page": n, "status": ..., "reviews": [...]}
+per fetched page, then {"event": "done", ...job status} (or "failed").
+"""
+
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+COMPANY_URL = "https://www.kununu.com/de/{company}/kommentare"
+KUNUNU_HOST = 'kununu.com'
+# Job exports may only be written below this folder
+OUTPUT_ROOT = 'outputs'
+MAX_JOB_PAGES = 2000  # also the limit of an all_pages job
+# Finished jobs (with their reviews) kept for the API; older ones are dropped
+JOB_RETENTION = 50
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ScrapeJob:
+    def __init__(self, job_id, base_url, pages, all_pages=False, formats=(), output_dir=None, max_retries=2,
+                 retry_backoff=10):
+        self.job_id = job_id
+        self.base_url = base_url
+        self.pages = pages
+        self.all_pages = all_pages
+        self.formats = list(formats)
+        self.output_dir = output_dir
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.status = QUEUED
+        self.error = None
+        self.reviews = []
+        self.failed_pages = {}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.closed = False  # set with the last event
+        self.changed = threading.Condition()
+
+    def emit(self, event, last=False):
+        with self.changed:
+            self.events.append(event)
+            self.closed = self.closed or last
+            self.changed.notify_all()
+
+    def follow(self, timeout=None):
+        """Yield the job's events from the first one, waiting for new ones until the job has finished"""
+        index = 0
+        while True:
+            with self.changed:
+                while index >= len(self.events) and not self.closed:
+                    if not self.changed.wait(timeout):
+                        return
+                events = self.events[index:]
+                closed = self.closed
+            index += len(events)
+            yield from events
+            if closed and index >= len(self.events):
+                return
+
+    def summary(self):
+        """Status of the job, without the reviews"""
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'base_url': self.base_url,
+            'pages': 'all' if self.all_pages else f"{self.pages[0]}-{self.pages[-1]}",
+            'reviews': len(self.reviews),
+            'failed_pages': {str(page): status for page, status in sorted(self.failed_pages.items())},
+            'output_dir': self.output_dir if self.formats else None,
+            'error': self.error,
+            'queued_seconds': round((self.started_at or time.time()) - self.created_at, 2),
+            'run_seconds': round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None,
+        }
+
+
+def check_base_url(base_url, allow_any_url=False):
+    """Reject a job's base_url that is not an http(s) kununu listing (any host if allow_any_url)"""
+    parts = urlsplit(str(base_url))
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError(f"invalid base_url '{base_url}' (expected an http(s) URL)")
+    host = parts.hostname.lower()
+    if not allow_any_url and host != KUNUNU_HOST and not host.endswith('.' + KUNUNU_HOST):
+        raise ValueError(f"base_url must be a {KUNUNU_HOST} listing (the service was not started with --allow-any-url)")
+
+
+def check_output_dir(output_dir, root=OUTPUT_ROOT):
+    """Return output_dir if it resolves to a folder below root; raises ValueError otherwise"""
+    root_path, path = os.path.realpath(root), os.path.realpath(str(output_dir))
+    if path == root_path or os.path.commonpath([root_path, path]) != root_path:
+        raise ValueError(f"output_dir must be a folder inside '{root}/'")
+    return output_dir
+
+
+def parse_job(request, next_id, default_base_url=None, export_formats=None, allow_any_url=False):
+    """Validate a job request (dict from the API) and return a ScrapeJob; raises ValueError
+
+    A base_url from the request must point at kununu unless allow_any_url; an
+    output_dir must stay inside OUTPUT_ROOT.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("the job must be a JSON object")
+    base_url = request.get('base_url')
+    if base_url:
+        check_base_url(base_url, allow_any_url)
+    else:
+        company = request.get('company')
+        if company:
+            if not str(company).replace('-', '').isalnum():
+                raise ValueError(f"invalid company '{company}' (expected the slug of the kununu URL)")
+            base_url = COMPANY_URL.format(company=company)
+        else:
+            base_url = default_base_url
+    if not base_url:
+        raise ValueError("give 'company' or 'base_url'")
+
+    start_page = int(request.get('start_page', 1))
+    all_pages = bool(request.get('all_pages', False))
+    if 'end_page' in request:
+        end_page = int(request['end_page'])
+    else:
+        end_page = start_page + int(request.get('pages', 1)) - 1
+    if start_page < 1 or end_page < start_page:
+        raise ValueError(f"invalid page range {start_page}-{end_page}")
+    if end_page - start_page + 1 > MAX_JOB_PAGES:
+        raise ValueError(f"at most {MAX_JOB_PAGES} pages per job")
+
+    formats = request.get('formats') or []
+    if isinstance(formats, str):
+        formats = [formats]
+    unknown = [fmt for fmt in formats if export_formats is not None and fmt not in export_formats]
+    if unknown:
+        raise ValueError(f"unknown format(s) {', '.join(map(str, unknown))}")
+    job_id = next_id()
+    output_dir = request.get('output_dir')
+    if output_dir:
+        check_output_dir(output_dir)
+    else:
+        output_dir = f"{OUTPUT_ROOT}/{datetime.now().strftime('%d%m%Y')} - job {job_id}"
+    return ScrapeJob(job_id, base_url, list(range(start_page, end_page + 1)), all_pages=all_pages,
+                     formats=formats, output_dir=output_dir, max_retries=int(request.get('max_retries', 2)),
+                     retry_backoff=float(request.get('retry_backoff', 10)))
+
+
+class ScrapeService:
+    def __init__(self, make_scraper, save_outputs, size=2, export_formats=None, default_base_url=None,
+                 allow_any_url=False, retention=JOB_RETENTION):
+        """Run jobs on size warm scrapers (made by make_scraper); save_outputs(scraper, folder, formats) exports
+
+        Jobs may only scrape kununu URLs unless allow_any_url. Only the last
+        retention finished jobs are kept.
+        """
+        self.make_scraper = make_scraper
+        self.save_outputs = save_outputs
+        self.size = max(1, size)
+        self.export_formats = set(export_formats) if export_formats else None
+        self.default_base_url = default_base_url
+        self.allow_any_url = allow_any_url
+        self.retention = retention
+        self.idle = queue.Queue()
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.ids_lock = threading.Lock()
+        self.jobs_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=self.size)
+
+    def warm_up(self):
+        """Start every scraper of the pool (browsers launch once, here)"""
+        start = time.perf_counter()
+        for _ in range(self.size):
+            scraper = self.make_scraper()
+            scraper.start()
+            self.idle.put(scraper)
+        print(f"✓ {self.size} scraper(s) warm in {time.perf_counter() - start:.1f}s")
+
+    def next_id(self):
+        with self.ids_lock:
+            return str(next(self.ids))
+
+    def submit(self, request):
+        """Validate and queue a job request; return the job (raises ValueError on a bad request)"""
+        job = parse_job(request, self.next_id, self.default_base_url, self.export_formats, self.allow_any_url)
+        with self.jobs_lock:
+            self.jobs[job.job_id] = job
+        self.executor.submit(self.run_job, job)
+        return job
+
+    def run_job(self, job):
+        scraper = self.idle.get()
+        job.status, job.started_at = RUNNING, time.time()
+        job.emit({'event': 'started', 'job_id': job.job_id, 'base_url': job.base_url})
+        healthy = True
+        try:
+            scraper.reset(job.base_url)
+
+            def on_page(page_num, status, reviews):
+                job.reviews.extend(reviews)
+                job.emit({'event': 'page', 'page': page_num, 'status': status, 'reviews': reviews})
+
+            scraper.scrape_all_pages(pages=job.pages, max_retries=job.max_retries, retry_backoff=job.retry_backoff,
+                                     discover=job.all_pages, max_discover_pages=MAX_JOB_PAGES, on_page=on_page,
+                                     keep_open=True)
+            job.failed_pages = dict(scraper.failed_pages)
+            if job.formats and scraper.reviews_data:
+                self.save_outputs(scraper, job.output_dir, job.formats)
+            job.status = DONE
+        except Exception as e:
+            traceback.print_exc()
+            job.status, job.error = FAILED, str(e)
+            healthy = False
+        finally:
+            job.finished_at = time.time()
+            if not healthy:
+                # Replace a scraper whose browser may be broken
+                scraper.close()
+                scraper = self.make_scraper()
+                scraper.start()
+            self.idle.put(scraper)
+            job.emit(dict(event=job.status, **job.summary()), last=True)
+            self.evict()
+
+    def evict(self):
+        """Forget the oldest finished jobs beyond the retention limit"""
+        with self.jobs_lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.status in (DONE, FAILED)]
+            for job_id in finished[:max(0, len(finished) - self.retention)]:
+                del self.jobs[job_id]
+
+    def health(self):
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        for job in list(self.jobs.values()):
+            counts[job.status] += 1
+        return {'pool_size': self.size, 'idle_scrapers': self.idle.qsize(), 'jobs': counts}
+
+    def shutdown(self):
+        """Wait for the running jobs, then quit every browser"""
+        self.executor.shutdown(wait=True)
+        while not self.idle.empty():
+            self.idle.get().close()
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, host='127.0.0.1', port=8787):
+        super().__init__((host, port), ServiceHandler)
+        self.service = service
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        service = self.server.service
+        parts = [part for part in self.path.split('?', 1)[0].split('/') if part]
+        if parts == ['health']:
+            self.send_json(200, service.health())
+        elif parts == ['jobs']:
+            self.send_json(200, [job.summary() for job in list(service.jobs.values())])
+        elif len(parts) in (2, 3) and parts[0] == 'jobs' and parts[1] in service.jobs:
+            job = service.jobs[parts[1]]
+            action = parts[2] if len(parts) == 3 else None
+            if action is None:
+                self.send_json(200, job.summary())
+            elif action == 'stream':
+                self.stream(job)
+            elif action == 'reviews':
+                self.send_json(200, job.reviews)
+            else:
+                self.send_json(404, {'error': f"unknown resource '{action}'"})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path.split('?', 1)[0].rstrip('/') != '/jobs':
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            job = service.submit(request)
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        if request.get('stream'):
+            self.stream(job)
+        else:
+            self.send_json(202, job.summary())
+
+    def stream(self, job):
+        """Send the job's events as JSON Lines while it runs (the response ends with the job)"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            for event in job.follow():
+                self.wfile.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away; the job keeps running
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"[service] {self.address_string()} {format % args}")
+
+
+def serve(service, host='127.0.0.1', port=8787):
+    """Warm the pool and answer API requests until interrupted"""
+    service.warm_up()
+    server = ServiceServer(service, host, port)
+    print(f"Scrape service listening on http://{host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping the scrape service...")
+    finally:
+        server.server_close()
+        service.shutdown()
@@ -8,7 +8,13 @@ import time
 import json
 import csv
 import os
+import re
+import sqlite3
 import sys
+import argparse
+import heapq
+import itertools
+from collections import deque
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -17,15 +23,96 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
 import requests
 
+from crawl_queue import PageQueue, run_worker
+from crawl_scheduler import BudgetedCrawl, PageHistory
+from scrape_service import JOB_RETENTION, ScrapeService, serve
+from review_identity import DedupIndex, find_site_review_id, review_identity
+from normalize import CATEGORIES, normalize_frame, reviews_to_frame
+from analytics import MonthlyAggregates, load_summary
+from text_analytics import TermIndex
+from review_store import ReviewStore
+from page_cache import ParseCache, page_fingerprint
+from dom_extract import extract_reviews, is_human_check
+from network_trace import NetworkTracer, enable_performance_log
+from page_plan import REVIEWS_PER_PAGE, CrawlPlan, find_total_reviews
+from hedging import Hedger, LatencyHistogram, LatencyTracker, RateBudget
+from dataset_store import DatasetStore
+from snapshots import SnapshotStore, change_counts, diff_snapshots
+from exporters import JSON_MODES, export_all, json_backend, read_json, write_csv, write_excel, write_json
+
+
+# Ways to locate the review elements of a listing page, in fallback order.
+# Each strainer makes BeautifulSoup build only the matching subtrees.
+REVIEW_STRATEGIES = [
+    ('article', SoupStrainer('article')),
+    ('review-class', SoupStrainer('div', class_=lambda x: x and 'review' in str(x).lower())),
+    ('review-testid', SoupStrainer(attrs={'data-testid': lambda x: x and 'review' in str(x).lower()})),
+    # Divs that contain review-like content (Selenium pages only)
+    ('card', SoupStrainer('div', class_=lambda x: x and ('index__' in str(x) or 'card' in str(x).lower()))),
+]
+
+# Reviewer positions: any text naming an employee, or starting with another kununu position label
+EMPLOYEE_WORDS = ('Angestellte', 'Arbeiter')
+POSITION_LABELS = ('Führungskraft', 'Azubi', 'Auszubildende', 'Student', 'Praktikant', 'Freelancer')
+
+
+def is_position_text(text):
+    text = str(text).strip()
+    if text.startswith('Ex-'):
+        text = text[3:]
+    return any(word in text for word in EMPLOYEE_WORDS) or text.startswith(POSITION_LABELS)
+
+
+# "Hat im Bereich Logistik / Materialwirtschaft bei Deutsche Post in Freiburg im Breisgau gearbeitet."
+WORKPLACE_PATTERN = re.compile(r'im Bereich\s+(.+?)(?:\s+bei\s+.+?)?(?:\s+in\s+(.+?))?\s+gearbeitet')
+
 
 class KununuScraper:
-    def __init__(self, base_url, use_selenium=True):
+    # Outcome of scraping one page
+    PAGE_OK = 'ok'
+    PAGE_EMPTY = 'empty'            # loaded fine but has no reviews: end of the listing
+    PAGE_FAILED = 'failed'          # network/browser error
+    PAGE_CHALLENGED = 'challenged'  # human verification page
+    
+    def __init__(self, base_url, use_selenium=True, dedup_path=None, parse_cache_path=None, extraction_mode='soup',
+                 challenge_wait=0, page_delay=3, load_wait=2, trace_dir=None, trace_threshold=20,
+                 hedge=False, hedge_percentile=95, hedge_budget=0.1):
         self.base_url = base_url
+        # Politeness delay between pages and the browser's fixed settle time (seconds); the
+        # defaults are meant for the live site, local test servers can use 0
+        self.page_delay = page_delay
+        self.load_wait = load_wait
+        # Selenium mode: 'soup' parses driver.page_source, 'script' extracts in the browser
+        self.extraction_mode = extraction_mode
+        # Seconds to wait for a human to solve a verification page (0 = defer the page right away)
+        self.challenge_wait = challenge_wait
+        # Pages that could not be scraped, with their last status
+        self.failed_pages = {}
         self.reviews_data = []
+        # Identities of reviews already collected (optionally persisted across runs)
+        self.seen = DedupIndex(dedup_path)
+        self.duplicates_skipped = 0
+        # Name of the REVIEW_STRATEGIES entry that last found reviews on this site
+        self.review_strategy = None
+        # Parsed records of earlier runs, keyed by the fingerprint of each page's review region
+        self.parse_cache = ParseCache(parse_cache_path) if parse_cache_path else None
+        # Selenium mode: per-page network timelines, HAR files of pages slower than trace_threshold seconds
+        self.tracer = NetworkTracer(trace_dir, trace_threshold) if trace_dir else None
+        # Total review count shown by the listing, reviews found per page and the page plan built from them
+        self.total_reviews = None
+        self.page_counts = {}
+        self.plan = None
+        # Time each page waited for the site; with hedge=True, fetches slower than the hedge_percentile
+        # of recent fetches get a second attempt (at most hedge_budget extra requests per fetch)
+        self.latency = LatencyHistogram()
+        self.hedger = Hedger(LatencyTracker(pct=hedge_percentile), RateBudget(hedge_budget)) if hedge else None
+        self.hedge_session = None
+        # The cookie banner only needs handling once per browser session
+        self.cookie_banner_handled = False
         self.driver = None
         self.use_selenium = use_selenium
         self.session = requests.Session()
@@ -48,6 +135,8 @@ class KununuScraper:
             chrome_options.add_argument("--no-sandbox")
             chrome_options.add_argument("--disable-dev-shm-usage")
             chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+            if self.tracer:
+                enable_performance_log(chrome_options)
             
             # Setup WebDriver with explicit chromedriver.exe path
             chrome_install = ChromeDriverManager().install()
@@ -75,9 +164,10 @@ class KununuScraper:
             )
             cookie_button.click()
             print("Cookie banner closed")
-            time.sleep(2)
+            time.sleep(self.load_wait)
         except Exception as e:
             print("No cookie banner found or already closed")
+        self.cookie_banner_handled = True
     
     def click_show_stars_buttons(self):
         """Click all 'show stars' buttons to reveal hidden category ratings"""
@@ -94,17 +184,17 @@ class KununuScraper:
                     try:
                         # Scroll to button to make it visible
                         self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                        time.sleep(0.5)
+                        time.sleep(self.load_wait / 4)
                         # Click the button
                         button.click()
-                        time.sleep(0.3)
+                        time.sleep(self.load_wait * 0.15)
                         print(f"  Clicked button {idx + 1}/{len(show_buttons)}")
                     except Exception as e:
                         print(f"  Failed to click button {idx + 1}: {e}")
                         continue
                 
                 print("All 'show stars' buttons clicked")
-                time.sleep(2)  # Wait for ratings to load
+                time.sleep(self.load_wait)  # Wait for ratings to load
             else:
                 print("No 'show stars' buttons found (ratings might be visible already)")
                 
@@ -114,6 +204,7 @@ class KununuScraper:
     def scrape_review(self, review_element):
         """Extract data from a single review element"""
         review_data = {
+            'review_id': '',
             'title': '',
             'rating': '',
             'recommendation': '',
@@ -129,6 +220,9 @@ class KununuScraper:
         }
         
         try:
+            # Extract the site's own review ID (falls back to a content hash in add_review)
+            review_data['review_id'] = find_site_review_id(review_element)
+            
             # Extract title
             title_elem = review_element.find('h3')
             if title_elem:
@@ -154,9 +248,14 @@ class KununuScraper:
                 review_data['date'] = date_elem.strip()
             
             # Extract position/department/location
-            position_elem = review_element.find(string=lambda x: x and 'Angestellte' in str(x) or 'Arbeiter' in str(x))
+            position_elem = review_element.find(string=lambda x: x and is_position_text(x))
             if position_elem:
                 review_data['position'] = position_elem.strip()
+            workplace_elem = review_element.find(string=lambda x: x and WORKPLACE_PATTERN.search(str(x)))
+            if workplace_elem:
+                match = WORKPLACE_PATTERN.search(str(workplace_elem))
+                review_data['department'] = match.group(1).strip()
+                review_data['location'] = (match.group(2) or '').strip()
             
             # Extract pros (Gut am Arbeitgeber)
             pros_section = review_element.find(string=lambda x: x and 'Gut am Arbeitgeber finde ich' in str(x))
@@ -186,16 +285,7 @@ class KununuScraper:
                         review_data['suggestions'] = next_elem.get_text(strip=True)
             
             # Extract category ratings (Arbeitsatmosphäre, Work-Life-Balance, etc.)
-            categories = [
-                'Arbeitsatmosphäre', 'Image', 'Work-Life-Balance', 
-                'Karriere/Weiterbildung', 'Gehalt/Sozialleistungen',
-                'Umwelt-/Sozialbewusstsein', 'Kollegenzusammenhalt',
-                'Umgang mit älteren Kollegen', 'Vorgesetztenverhalten',
-                'Arbeitsbedingungen', 'Kommunikation', 'Gleichberechtigung',
-                'Interessante Aufgaben'
-            ]
-            
-            for category in categories:
+            for category in CATEGORIES:
                 # Find all h4 tags and check if any contains the category name
                 all_h4 = review_element.find_all('h4')
                 for h4 in all_h4:
@@ -242,7 +332,7 @@ class KununuScraper:
                                             score_int = int(data_score)
                                             # Validate range (must be 1-5)
                                             if 1 <= score_int <= 5:
-                                                review_data['category_ratings'][category] = str(score_int)
+                                                review_data['category_ratings'][category] = score_int
                                                 print(f"  ✓ {category}: data-score={data_score} → {score_int} bintang")
                                             else:
                                                 print(f"  ⚠ {category}: data-score={data_score} diabaikan (nilai tidak valid)")
@@ -258,6 +348,86 @@ class KununuScraper:
         
         return review_data
     
+    def note_page(self, html, page_num, found):
+        """Record how many reviews a page had; read the listing's total review count until it is known"""
+        self.page_counts[page_num] = found
+        if self.total_reviews is None and html is not None:
+            self.total_reviews = find_total_reviews(html)
+            if self.total_reviews:
+                print(f"The listing shows {self.total_reviews} reviews")
+
+    def make_plan(self, pages=None, start_page=1):
+        """Build the page plan once the total is known (per page: the first counted page, at least REVIEWS_PER_PAGE)"""
+        if self.plan is None and self.total_reviews:
+            first_count = next(iter(self.page_counts.values()), 0)
+            self.plan = CrawlPlan(self.total_reviews, max(first_count, REVIEWS_PER_PAGE), pages, start_page)
+            print(f"Planned {len(self.plan.pages)} pages (last page of the listing: {self.plan.last_page}, "
+                  f"~{self.plan.expected_reviews} reviews)")
+        return self.plan
+
+    def add_review(self, review_data):
+        """Add a scraped review unless it is empty or was already collected"""
+        if not review_data['title']:  # Only add if we got some data
+            return False
+        review_data['review_id'] = review_identity(review_data)
+        if not self.seen.add(review_data['review_id']):
+            # The newest-first listing shifted and the review showed up again
+            self.duplicates_skipped += 1
+            print(f"  Skipping duplicate review: {review_data['title'][:60]}")
+            return False
+        self.reviews_data.append(review_data)
+        return True
+    
+    def find_review_elements(self, html, card_fallback=True):
+        """Parse only the review subtrees of a page, trying the learned strategy first"""
+        strategies = [strategy for strategy in REVIEW_STRATEGIES if card_fallback or strategy[0] != 'card']
+        if self.review_strategy:
+            # Try the strategy that worked on earlier pages before re-learning
+            strategies.sort(key=lambda strategy: strategy[0] != self.review_strategy)
+        
+        for name, strainer in strategies:
+            soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+            reviews = soup.find_all(strainer.name, attrs=strainer.attrs)
+            if reviews:
+                if name != self.review_strategy:
+                    if self.review_strategy:
+                        print(f"Review selector '{self.review_strategy}' found nothing, switched to '{name}'")
+                    else:
+                        print(f"Review selector learned: '{name}'")
+                    self.review_strategy = name
+                return reviews
+        return []
+    
+    def parse_page(self, html, page_num, card_fallback=True):
+        """Extract the review records of a page (reused from the parse cache if the reviews are unchanged)"""
+        fingerprint = None
+        if self.parse_cache is not None:
+            fingerprint = page_fingerprint(html)
+            cached = self.parse_cache.get(fingerprint)
+            if cached is not None:
+                print(f"Page {page_num} unchanged since it was last parsed, reusing {len(cached)} cached records")
+                return cached
+        
+        reviews = [self.scrape_review(review) for review in self.find_review_elements(html, card_fallback)]
+        
+        if fingerprint is not None and reviews:
+            self.parse_cache.put(fingerprint, page_num, reviews)
+        return reviews
+    
+    def http_get(self, url):
+        """GET a page (hedged with a second session when enabled) and record how long it took"""
+        start = time.perf_counter()
+        if self.hedger is None:
+            response = self.session.get(url, timeout=30)
+        else:
+            if self.hedge_session is None:
+                self.hedge_session = requests.Session()
+                self.hedge_session.headers.update(self.session.headers)
+            response = self.hedger.fetch(lambda: self.session.get(url, timeout=30),
+                                         lambda: self.hedge_session.get(url, timeout=30))
+        self.latency.record(time.perf_counter() - start)
+        return response
+
     def scrape_page_with_requests(self, page_num=1):
         """Scrape a single page using requests (no browser needed)"""
         if page_num == 1:
@@ -268,31 +438,28 @@ class KununuScraper:
         print(f"Scraping page {page_num}: {url}")
         
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.http_get(url)
             response.raise_for_status()
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all review elements
-            reviews = soup.find_all('article') or soup.find_all('div', class_=lambda x: x and 'review' in str(x).lower())
+            if b'confirm you are human' in response.content:
+                print(f"Human verification on page {page_num}. Deferring it and continuing with other pages.")
+                return self.PAGE_CHALLENGED
             
-            if not reviews:
-                # Alternative method - find by data attributes or other patterns
-                reviews = soup.find_all(attrs={'data-testid': lambda x: x and 'review' in str(x).lower()})
+            # Parse the raw bytes so BeautifulSoup detects the encoding
+            reviews = self.parse_page(response.content, page_num, card_fallback=False)
+            self.note_page(response.content, page_num, len(reviews))
             
             print(f"Found {len(reviews)} reviews on page {page_num}")
             
-            for review in reviews:
-                review_data = self.scrape_review(review)
-                if review_data['title']:  # Only add if we got some data
-                    self.reviews_data.append(review_data)
+            for review_data in reviews:
+                self.add_review(review_data)
             
-            return len(reviews) > 0  # Return True if reviews found
+            # No reviews on a page that loaded fine means the listing has ended
+            return self.PAGE_OK if reviews else self.PAGE_EMPTY
             
         except Exception as e:
             print(f"Error scraping page {page_num}: {e}")
-            return False
+            return self.PAGE_FAILED
     
     def scrape_page(self, page_num=1):
         """Scrape a single page of reviews"""
@@ -304,130 +471,265 @@ class KununuScraper:
         print(f"Scraping page {page_num}: {url}")
         
         try:
-            self.driver.get(url)
-            time.sleep(2)  # short initial wait for the page to start loading
+            start = time.perf_counter()
+            if self.hedger:
+                self.hedger.load(self.driver, url)
+            else:
+                self.driver.get(url)
+            self.latency.record(time.perf_counter() - start)
+            time.sleep(self.load_wait)  # short initial wait for the page to start loading
 
             # Human-verification detection: if a header like
-            # <h1 ...>Let's confirm you are human</h1> appears, wait 5 seconds
-            # to let the user solve it. Allow up to 2 attempts (2 "lives").
-            attempts = 0
-            max_attempts = 2
-            while attempts < max_attempts:
-                page_src = (self.driver.page_source or "").lower()
-                # Look for a short identifying phrase rather than exact style
-                if "confirm you are human" in page_src or "let's confirm you are human" in page_src or "lets confirm you are human" in page_src:
-                    attempts += 1
-                    print(f"Human verification detected. Waiting 10 seconds (attempt {attempts}/{max_attempts}) for you to solve it...")
-                    time.sleep(10)
-                    # After waiting, re-load the page source to check if cleared
-                    page_src = (self.driver.page_source or "").lower()
-                    if "confirm you are human" in page_src:
-                        if attempts < max_attempts:
-                            print("Verification still present. Refreshing the page and will wait again.")
-                            try:
-                                self.driver.refresh()
-                            except Exception:
-                                pass
-                            time.sleep(2)
-                            continue
-                        else:
-                            print("Verification still present after 2 attempts. Skipping this page.")
-                            return False
-                    else:
+            # <h1 ...>Let's confirm you are human</h1> appears, optionally wait
+            # challenge_wait seconds for the user to solve it in the browser;
+            # otherwise the page is deferred and the crawl moves on.
+            # Look for a short identifying phrase in the title/headings (in the browser,
+            # without copying the whole page source)
+            if is_human_check(self.driver):
+                if self.challenge_wait:
+                    print(f"Human verification detected. Waiting {self.challenge_wait} seconds for you to solve it...")
+                    time.sleep(self.challenge_wait)
+                    if not is_human_check(self.driver):
                         print("Verification cleared. Continuing scraping.")
-                        break
+                    else:
+                        print(f"Verification still present on page {page_num}. Deferring it.")
+                        return self.PAGE_CHALLENGED
                 else:
-                    break
+                    print(f"Human verification on page {page_num}. Deferring it and continuing with other pages.")
+                    return self.PAGE_CHALLENGED
 
-            # Close cookie banner on first page
-            if page_num == 1:
+            # Close cookie banner on first page (once per browser session)
+            if page_num == 1 and not self.cookie_banner_handled:
                 self.close_cookie_banner()
 
             # Scroll multiple times to trigger lazy loading
             for i in range(3):
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+                time.sleep(self.load_wait)
 
             # Scroll back to top
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            time.sleep(self.load_wait)
             
             # Click all "show stars" buttons to reveal hidden ratings
             self.click_show_stars_buttons()
 
-            # Get page source and parse with BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            # Find all review elements - try multiple selectors
-            reviews = soup.find_all('article') 
-            
-            if not reviews:
-                reviews = soup.find_all('div', class_=lambda x: x and 'review' in str(x).lower())
-            
-            if not reviews:
-                # Alternative method - find by data attributes or other patterns
-                reviews = soup.find_all(attrs={'data-testid': lambda x: x and 'review' in str(x).lower()})
-            
-            if not reviews:
-                # Try finding divs that contain review-like content
-                reviews = soup.find_all('div', class_=lambda x: x and ('index__' in str(x) or 'card' in str(x).lower()))
+            if self.extraction_mode == 'script':
+                # Walk the live DOM in the browser and get all records in one round trip
+                reviews = extract_reviews(self.driver)
+                # The page source is only needed until the total review count is known
+                html = self.driver.page_source if self.total_reviews is None else None
+            else:
+                # Get page source and parse with BeautifulSoup (skipped if the reviews are unchanged)
+                html = self.driver.page_source
+                reviews = self.parse_page(html, page_num)
+            self.note_page(html, page_num, len(reviews))
             
             print(f"Found {len(reviews)} review elements on page {page_num}")
             
-            for review in reviews:
-                review_data = self.scrape_review(review)
-                if review_data['title']:  # Only add if we got some data
-                    self.reviews_data.append(review_data)
+            for review_data in reviews:
+                self.add_review(review_data)
             
-            return len(reviews) > 0  # Return True if reviews found
+            # No reviews on a page that loaded fine means the listing has ended
+            return self.PAGE_OK if reviews else self.PAGE_EMPTY
             
         except Exception as e:
             print(f"Error scraping page {page_num}: {e}")
-            return False
+            return self.PAGE_FAILED
     
-    def scrape_all_pages(self, max_pages=5):
-        """Scrape multiple pages of reviews"""
-        print(f"Starting to scrape up to {max_pages} pages...")
-        
-        if self.use_selenium:
+    def start(self):
+        """Start the browser (falls back to requests mode if Selenium can't start)"""
+        if self.use_selenium and not self.driver:
             try:
                 self.setup_driver()
             except Exception as e:
                 print(f"\n⚠ Selenium failed to start. Switching to requests method...")
                 print("This method doesn't require Chrome or ChromeDriver.")
                 self.use_selenium = False
+    
+    def reset(self, base_url=None):
+        """Forget the reviews and page state of the last crawl; the browser and HTTP session stay warm"""
+        if base_url and base_url != self.base_url:
+            self.base_url = base_url
+            self.review_strategy = None
+        self.seen.flush()
+        self.seen = DedupIndex(None)
+        self.reviews_data = []
+        self.failed_pages = {}
+        self.duplicates_skipped = 0
+        self.total_reviews = None
+        self.page_counts = {}
+        self.plan = None
+        self.latency = LatencyHistogram()
+
+    def close(self):
+        """Quit the browser if one is running and stop the hedge threads"""
+        self.seen.flush()
+        if self.tracer:
+            self.tracer.write_summary()
+        if self.hedger:
+            self.hedger.close()
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+            print("WebDriver closed")
+    
+    def fetch_page(self, page_num):
+        """Scrape one page and return (status, reviews found on that page)"""
+        first = len(self.reviews_data)
+        if self.use_selenium and self.tracer:
+            self.tracer.begin(self.driver)
+            start = time.perf_counter()
+            status = self.scrape_page(page_num)
+            url = self.base_url if page_num == 1 else f"{self.base_url}/{page_num}"
+            try:
+                self.tracer.end(self.driver, page_num, url, time.perf_counter() - start, status)
+            except Exception as e:
+                print(f"⚠ No network trace for page {page_num}: {e}")
+        elif self.use_selenium:
+            status = self.scrape_page(page_num)
+        else:
+            status = self.scrape_page_with_requests(page_num)
+        return status, self.reviews_data[first:]
+    
+    def scrape_all_pages(self, max_pages=5, start_page=1, pages=None, max_retries=3, retry_backoff=30,
+                         discover=False, on_page=None, keep_open=False, max_discover_pages=None):
+        """Scrape multiple pages of reviews (a contiguous range or an explicit page list)
+        
+        Failed or challenged pages go to a deferred retry queue (backoff doubles
+        per attempt) while the crawl continues. Once a page shows the listing's
+        total review count, the pages are planned upfront: pages past the last
+        one are dropped, progress is reported with an ETA and an empty page
+        before the last one is retried instead of ending the listing. Without a
+        count, only an empty page ends the listing. With discover=True the crawl
+        runs from the first page to the last page of the listing, or for at
+        most max_discover_pages pages.
+
+        on_page(page_num, status, new reviews) is called after every fetch;
+        keep_open=True leaves the browser running for the next crawl.
+        """
+        if pages is None:
+            pages = list(range(start_page, start_page + (1 if discover else max_pages)))
+        else:
+            pages = list(pages)
+        print(f"Starting to scrape {'the whole listing' if discover else f'{len(pages)} pages'}...")
+        last_allowed = pages[0] + max_discover_pages - 1 if discover and max_discover_pages else None
+        if discover:
+            planned_pages = range(pages[0], last_allowed + 1) if last_allowed else None
+        else:
+            planned_pages = pages
+        
+        pending = deque(pages)
+        deferred = []  # heap of (retry_at, page_num, attempts)
+        end_of_listing = None
+        first_page = True
+        started_at = time.time()
+        
+        self.start()
         
         try:
-            for page_num in range(1, max_pages + 1):
-                if self.use_selenium:
-                    success = self.scrape_page(page_num)
+            while pending or deferred:
+                now = time.time()
+                if deferred and (deferred[0][0] <= now or not pending):
+                    retry_at, page_num, attempts = heapq.heappop(deferred)
+                    if retry_at > now:
+                        print(f"Waiting {retry_at - now:.0f} seconds before retrying page {page_num}...")
+                        time.sleep(retry_at - now)
                 else:
-                    success = self.scrape_page_with_requests(page_num)
+                    page_num, attempts = pending.popleft(), 0
                 
-                if not success:
-                    print(f"No more reviews found at page {page_num}. Stopping.")
-                    break
+                if end_of_listing is not None and page_num > end_of_listing:
+                    self.failed_pages.pop(page_num, None)
+                    continue
                 
                 # Be respectful - add delay between pages
-                if page_num < max_pages:
-                    print("Waiting 3 seconds before next page...")
-                    time.sleep(3)
+                if not first_page and self.page_delay:
+                    print(f"Waiting {self.page_delay} seconds before next page...")
+                    time.sleep(self.page_delay)
+                first_page = False
+                
+                status, new_reviews = self.fetch_page(page_num)
+                if on_page is not None:
+                    on_page(page_num, status, new_reviews)
+                
+                if self.plan is None and self.make_plan(planned_pages, pages[0]):
+                    # Known page set: skip pages past the end, add the rest of the listing when discovering
+                    self.plan.started_at = started_at
+                    pending = deque(page for page in pending if page <= self.plan.last_page)
+                    deferred = [item for item in deferred if item[1] <= self.plan.last_page]
+                    heapq.heapify(deferred)
+                    done = set(self.page_counts) | set(self.failed_pages)
+                    retrying = {page for _, page, _ in deferred}
+                    if discover:
+                        pending.extend(page for page in self.plan.pages
+                                       if page not in done and page not in retrying and page not in pending)
+                    for page in done - retrying - {page_num}:
+                        if page > self.plan.last_page:
+                            self.failed_pages.pop(page, None)
+                        else:
+                            self.plan.settle(page)
+                elif self.plan is None and discover and status == self.PAGE_OK and not pending:
+                    # No count on the listing: probe page by page until an empty one
+                    if last_allowed is None or page_num < last_allowed:
+                        pending.append(page_num + 1)
+                    else:
+                        print(f"Stopping at page {page_num} (at most {max_discover_pages} pages)")
+                
+                planned = self.plan is not None and page_num <= self.plan.last_page
+                settled = True
+                if status == self.PAGE_OK:
+                    self.failed_pages.pop(page_num, None)
+                elif status == self.PAGE_EMPTY and not planned:
+                    print(f"No more reviews found at page {page_num}. Skipping later pages.")
+                    self.failed_pages.pop(page_num, None)
+                    end_of_listing = page_num if end_of_listing is None else min(end_of_listing, page_num)
+                    pending = deque(p for p in pending if p < end_of_listing)
+                else:
+                    self.failed_pages[page_num] = status
+                    attempts += 1
+                    if attempts <= max_retries:
+                        backoff = retry_backoff * 2 ** (attempts - 1)
+                        print(f"⚠ Page {page_num} {status}. Retry {attempts}/{max_retries} in {backoff} seconds.")
+                        heapq.heappush(deferred, (time.time() + backoff, page_num, attempts))
+                        settled = False
+                    else:
+                        print(f"✗ Page {page_num} {status} after {max_retries} retries. Giving up on it.")
+                
+                if self.plan is not None and settled:
+                    self.plan.settle(page_num)
+                    print(self.plan.progress(len(self.reviews_data)))
             
         finally:
-            if self.driver:
-                self.driver.quit()
-                print("WebDriver closed")
+            if keep_open:
+                self.seen.flush()
+            else:
+                self.close()
         
         print(f"Total reviews scraped: {len(self.reviews_data)}")
+        if self.duplicates_skipped:
+            print(f"Duplicate reviews skipped: {self.duplicates_skipped}")
+        if self.parse_cache is not None:
+            print(f"Parse cache: {self.parse_cache.hits} unchanged pages reused, {self.parse_cache.misses} parsed")
+        if self.failed_pages:
+            print(f"⚠ {len(self.failed_pages)} pages were never recovered:")
+            for page_num, status in sorted(self.failed_pages.items()):
+                print(f"  ✗ page {page_num}: {status}")
+        self.latency.report()
+        if self.hedger:
+            self.hedger.report()
+        if self.plan is not None:
+            missing, short = self.plan.check(self.page_counts)
+            if missing:
+                print(f"⚠ {len(missing)} planned pages missing: {missing[:20]}" + (" ..." if len(missing) > 20 else ""))
+            for page_num, (found, expected) in sorted(short.items()):
+                print(f"  ⚠ page {page_num}: {found} of {expected} expected reviews")
     
-    def save_to_json(self, filename='outputs/reviews.json'):
-        """Save scraped data to JSON file"""
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.reviews_data, f, ensure_ascii=False, indent=2)
+    def save_to_json(self, filename='outputs/reviews.json', mode='pretty'):
+        """Save scraped data to JSON file (mode: 'pretty', 'compact' or 'jsonl' for JSON Lines)"""
+        # Streamed one review at a time, with typed rating, month and category ratings
+        write_json(self.reviews_data, filename, mode=mode)
         
-        print(f"Data saved to {filename}")
+        print(f"Data saved to {filename} ({json_backend()}, {mode})")
     
     def save_to_csv(self, filename='outputs/reviews.csv'):
         """Save scraped data to CSV file"""
@@ -437,34 +739,8 @@ class KununuScraper:
             print("No data to save!")
             return
         
-        # Flatten the nested categories dictionary
-        flattened_data = []
-        for review in self.reviews_data:
-            flat_review = {
-                'title': review['title'],
-                'rating': review['rating'],
-                'recommendation': review['recommendation'],
-                'date': review['date'],
-                'position': review['position'],
-                'department': review['department'],
-                'location': review['location'],
-                'pros': review['pros'],
-                'cons': review['cons'],
-                'suggestions': review['suggestions']
-            }
-            # Add category text comments as separate columns
-            for cat_name, cat_value in review['categories'].items():
-                flat_review[f"{cat_name}_comment"] = cat_value
-            
-            # Add category ratings as separate columns with '_rating' suffix
-            for cat_name, cat_rating in review.get('category_ratings', {}).items():
-                flat_review[f"{cat_name}_rating"] = cat_rating
-            
-            flattened_data.append(flat_review)
-        
-        # Create DataFrame and save to CSV
-        df = pd.DataFrame(flattened_data)
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+        # Flatten the nested categories dictionary and convert to typed columns
+        write_csv(normalize_frame(reviews_to_frame(self.reviews_data)), filename)
         
         print(f"Data saved to {filename}")
     
@@ -476,78 +752,662 @@ class KununuScraper:
             print("No data to save!")
             return
         
-        # Flatten the nested categories dictionary
-        flattened_data = []
-        for review in self.reviews_data:
-            flat_review = {
-                'title': review['title'],
-                'rating': review['rating'],
-                'recommendation': review['recommendation'],
-                'date': review['date'],
-                'position': review['position'],
-                'department': review['department'],
-                'location': review['location'],
-                'pros': review['pros'],
-                'cons': review['cons'],
-                'suggestions': review['suggestions']
-            }
-            # Add category text comments as separate columns
-            for cat_name, cat_value in review['categories'].items():
-                flat_review[f"{cat_name}_comment"] = cat_value
-            
-            # Add category ratings as separate columns with '_rating' suffix
-            for cat_name, cat_rating in review.get('category_ratings', {}).items():
-                flat_review[f"{cat_name}_rating"] = cat_rating
-            
-            flattened_data.append(flat_review)
+        # Stream normalized rows into the workbook (xlsxwriter constant_memory or openpyxl write_only)
+        writer = write_excel(self.reviews_data, filename)
         
-        # Create DataFrame and save to Excel
-        df = pd.DataFrame(flattened_data)
-        df.to_excel(filename, index=False, engine='openpyxl')
+        print(f"Data saved to {filename} ({writer.engine}, {writer.sheet_count} sheet(s))")
+
+    def save_to_sqlite(self, filename='outputs/reviews.db'):
+        """Save scraped data to a SQLite database with a full-text index (updates existing reviews)"""
+        if not self.reviews_data:
+            print("No data to save!")
+            return
         
-        print(f"Data saved to {filename}")
+        store = ReviewStore(filename)
+        store.upsert_reviews(self.reviews_data)
+        total = store.count()
+        store.close()
+        
+        print(f"Data saved to {filename} ({total} reviews in database)")
 
 
-def main():
-    """Main function to run the scraper"""
-    print("=" * 60)
-    print("Kununu Scraper - Deutsche Post & DHL Reviews")
-    print("=" * 60)
-    
-    # Base URL
-    base_url = "https://www.kununu.com/de/deutsche-post/kommentare"
-    
-    # Always use Selenium
-    print("\nSelenium mode is enabled (Chrome browser required)")
-    use_selenium = True
+DEFAULT_BASE_URL = "https://www.kununu.com/de/deutsche-post/kommentare"
+EXPORT_FORMATS = ('json', 'csv', 'xlsx', 'sqlite', 'columnar')
+DEFAULT_FORMATS = ['json', 'csv', 'xlsx', 'columnar']
+DEFAULT_QUEUE_DB = "outputs/crawl_queue.db"
+DEFAULT_ANALYTICS_DIR = "outputs/analytics"
+DEFAULT_TERMS_DIR = "outputs/terms"
+DEFAULT_REVIEW_DB = "outputs/reviews.db"
+DEFAULT_PAGE_HISTORY = "outputs/page_history.db"
+DEFAULT_DATASET_DIR = "outputs/dataset"
+DEFAULT_SNAPSHOT_DB = "outputs/snapshots.db"
+
+
+def parse_shard(value):
+    """Parse a '--shard i/N' value into (i, N), with 1 <= i <= N"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected i/N (e.g. 2/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', i must be between 1 and N")
+    return index, count
 
-    # Create scraper instance
-    scraper = KununuScraper(base_url, use_selenium=use_selenium)
 
-    # Scrape reviews (adjust max_pages as needed)
-    max_pages = int(input("\nHow many pages to scrape? (Enter number, e.g., 5): ") or "5")
-    scraper.scrape_all_pages(max_pages=max_pages)
+def shard_pages(start_page, end_page, shard=None):
+    """Return the pages of [start_page, end_page] owned by a shard
 
-    # Prepare output folder name
+    Pages are dealt round-robin (page start+k goes to shard k % N + 1), so every
+    machine gets a deterministic, interleaved slice of both new and old reviews.
+    """
+    pages = list(range(start_page, end_page + 1))
+    if shard is None:
+        return pages
+    index, count = shard
+    return pages[index - 1::count]
+
+
+def default_output_folder(start_page, end_page, shard=None):
+    """Build the output folder name for a run (one folder per shard)"""
     today_str = datetime.now().strftime("%d%m%Y")
-    folder_name = f"outputs/{today_str} - {max_pages} pages"
-    os.makedirs(folder_name, exist_ok=True)
+    if start_page == 1 and shard is None:
+        return f"outputs/{today_str} - {end_page} pages"
+    folder_name = f"outputs/{today_str} - pages {start_page}-{end_page}"
+    if shard is not None:
+        folder_name += f" - shard {shard[0]} of {shard[1]}"
+    return folder_name
+
+
+def save_outputs(scraper, folder_name, formats=DEFAULT_FORMATS, json_mode='pretty', executor='thread'):
+    """Save the scraper's reviews in the requested formats inside folder_name (written concurrently)"""
+    export_all(scraper.reviews_data, folder_name, formats, json_mode=json_mode, executor=executor)
+
+
+def merge_outputs(paths):
+    """Load reviews.json (or reviews.jsonl) from shard folders or files and drop duplicate reviews"""
+    merged = []
+    seen = DedupIndex()
+    for path in paths:
+        if os.path.isdir(path):
+            json_path = os.path.join(path, "reviews.json")
+            path = json_path if os.path.exists(json_path) else os.path.join(path, "reviews.jsonl")
+        reviews = read_json(path)
+        duplicates = 0
+        for review in reviews:
+            review['review_id'] = review_identity(review)
+            if not seen.add(review['review_id']):
+                duplicates += 1
+                continue
+            merged.append(review)
+        print(f"Loaded {len(reviews)} reviews from {path} ({duplicates} duplicates skipped)")
+    return merged
+
+
+def build_parser():
+    """Build the command line interface"""
+    parser = argparse.ArgumentParser(description="Kununu Scraper - Deutsche Post & DHL Reviews")
+    subparsers = parser.add_subparsers(dest='command')
+
+    scrape = subparsers.add_parser('scrape', help="scrape a range of review pages (default command)")
+    scrape.add_argument('--base-url', default=DEFAULT_BASE_URL, help="review listing URL")
+    scrape.add_argument('--start-page', type=int, default=1, help="first page to scrape (default: 1)")
+    scrape.add_argument('--end-page', type=int, help="last page to scrape, inclusive")
+    scrape.add_argument('--pages', type=int, help="number of pages to scrape from --start-page")
+    scrape.add_argument('--all-pages', action='store_true',
+                        help="scrape to the last page, planned from the review count the listing shows")
+    scrape.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help="only scrape shard i of N of the page range (round-robin split)")
+    scrape.add_argument('--output-dir', help="output folder (default: outputs/<date> - ...)")
+    scrape.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=DEFAULT_FORMATS)
+    scrape.add_argument('--json-mode', choices=JSON_MODES, default='pretty',
+                        help="pretty or compact JSON array, or JSON Lines (reviews.jsonl)")
+    scrape.add_argument('--requests', dest='use_selenium', action='store_false',
+                        help="use plain HTTP requests instead of Selenium")
+    scrape.add_argument('--challenge-wait', type=int, default=0, metavar='SECONDS',
+                        help="wait for a human verification to be solved in the browser (default: defer the page)")
+    scrape.add_argument('--max-retries', type=int, default=3,
+                        help="retries for failed or challenged pages (with doubling backoff)")
+    scrape.add_argument('--extract', dest='extraction_mode', choices=('soup', 'script'), default='soup',
+                        help="Selenium mode: parse page_source with BeautifulSoup or extract in the browser")
+    scrape.add_argument('--trace-dir', metavar='PATH',
+                        help="Selenium mode: record network timelines, write HAR files of slow pages and a summary")
+    scrape.add_argument('--trace-threshold', type=float, default=20, metavar='SECONDS',
+                        help="with --trace-dir: pages slower than this get a HAR file (default: 20)")
+    scrape.add_argument('--hedge', action='store_true',
+                        help="send a second request for fetches slower than the --hedge-percentile of recent ones")
+    scrape.add_argument('--hedge-percentile', type=float, default=95,
+                        help="with --hedge: latency percentile after which a fetch is hedged (default: 95)")
+    scrape.add_argument('--hedge-budget', type=float, default=0.1,
+                        help="with --hedge: most extra requests per fetch (default: 0.1 = 10%%)")
+    scrape.add_argument('--budget', type=float, metavar='MINUTES',
+                        help="wall-clock budget: newest pages first, then the stalest; unfinished pages are recorded")
+    scrape.add_argument('--max-workers', type=int, default=4,
+                        help="with --budget: most pages fetched at once (scaled to the deadline)")
+    scrape.add_argument('--recent-pages', type=int, default=5,
+                        help="with --budget: pages 1..N are always fetched first")
+    scrape.add_argument('--page-history', default=DEFAULT_PAGE_HISTORY, metavar='PATH',
+                        help="with --budget: SQLite file of when each page was last fetched")
+    scrape.add_argument('--dedup-index', metavar='PATH',
+                        help="SQLite file of review identities; reviews seen in earlier runs are skipped")
+    scrape.add_argument('--parse-cache', metavar='PATH',
+                        help="SQLite cache of parsed pages; pages whose reviews are unchanged are not re-parsed")
+    scrape.add_argument('--analytics-dir', metavar='PATH',
+                        help=f"also add the new reviews to the monthly aggregates (e.g. {DEFAULT_ANALYTICS_DIR})")
+    scrape.add_argument('--terms-dir', metavar='PATH',
+                        help=f"also add the new reviews to the term-frequency index (e.g. {DEFAULT_TERMS_DIR})")
+    scrape.add_argument('--dataset-dir', metavar='PATH',
+                        help=f"also append the reviews to the partitioned dataset (e.g. {DEFAULT_DATASET_DIR})")
+
+    merge = subparsers.add_parser('merge', help="combine shard outputs into one deduplicated dataset")
+    merge.add_argument('inputs', nargs='+', help="shard output folders or reviews.json files")
+    merge.add_argument('--output-dir', default=None, help="output folder (default: outputs/<date> - merged)")
+    merge.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=DEFAULT_FORMATS)
+    merge.add_argument('--json-mode', choices=JSON_MODES, default='pretty',
+                       help="pretty or compact JSON array, or JSON Lines (reviews.jsonl)")
+
+    service = subparsers.add_parser('serve', help="long-running service: warm scrapers, jobs through an HTTP/JSON API")
+    service.add_argument('--host', default='127.0.0.1', help="address to listen on (default: localhost only)")
+    service.add_argument('--port', type=int, default=8787)
+    service.add_argument('--pool-size', type=int, default=2, help="warm scrapers (browsers), i.e. jobs run at once")
+    service.add_argument('--base-url', default=DEFAULT_BASE_URL, help="listing used by jobs without a company")
+    service.add_argument('--requests', dest='use_selenium', action='store_false',
+                         help="use plain HTTP requests instead of Selenium")
+    service.add_argument('--extract', dest='extraction_mode', choices=('soup', 'script'), default='soup',
+                         help="Selenium mode: parse page_source with BeautifulSoup or extract in the browser")
+    service.add_argument('--page-delay', type=float, default=3, help="seconds between the pages of a job")
+    service.add_argument('--allow-any-url', action='store_true',
+                         help="accept job base_urls on hosts other than kununu.com (e.g. the synthetic site)")
+    service.add_argument('--job-retention', type=int, default=JOB_RETENTION,
+                         help="finished jobs (and their reviews) kept for the API")
+
+    queue = subparsers.add_parser('queue', help="distributed crawl through a shared page work-queue")
+    queue_actions = queue.add_subparsers(dest='action', required=True)
+
+    queue_init = queue_actions.add_parser('init', help="create the queue and add a page range to it")
+    queue_init.add_argument('--db', default=DEFAULT_QUEUE_DB, help="queue database file")
+    queue_init.add_argument('--start-page', type=int, default=1)
+    queue_init.add_argument('--end-page', type=int, required=True)
+
+    queue_worker = queue_actions.add_parser('worker', help="lease and scrape pages until the queue is drained")
+    queue_worker.add_argument('--db', default=DEFAULT_QUEUE_DB, help="queue database file")
+    queue_worker.add_argument('--base-url', default=DEFAULT_BASE_URL, help="review listing URL")
+    queue_worker.add_argument('--worker-id', help="worker name (default: <hostname>-<pid>)")
+    queue_worker.add_argument('--lease-seconds', type=int, default=300,
+                              help="how long a page lease lasts before it is handed to another worker")
+    queue_worker.add_argument('--max-attempts', type=int, default=3, help="attempts per page before giving up")
+    queue_worker.add_argument('--requests', dest='use_selenium', action='store_false',
+                              help="use plain HTTP requests instead of Selenium")
+    queue_worker.add_argument('--extract', dest='extraction_mode', choices=('soup', 'script'), default='soup',
+                              help="Selenium mode: parse page_source with BeautifulSoup or extract in the browser")
+
+    queue_status = queue_actions.add_parser('status', help="show queue progress")
+    queue_status.add_argument('--db', default=DEFAULT_QUEUE_DB, help="queue database file")
+
+    queue_collect = queue_actions.add_parser('collect', help="export all collected reviews")
+    queue_collect.add_argument('--db', default=DEFAULT_QUEUE_DB, help="queue database file")
+    queue_collect.add_argument('--output-dir', default=None, help="output folder (default: outputs/<date> - queue)")
+    queue_collect.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=DEFAULT_FORMATS)
+
+    analytics = subparsers.add_parser('analytics', help="incremental monthly aggregates of the category ratings")
+    analytics_actions = analytics.add_subparsers(dest='action', required=True)
+
+    analytics_update = analytics_actions.add_parser('update', help="add reviews from output folders to the aggregates")
+    analytics_update.add_argument('inputs', nargs='+', help="output folders or reviews.json files")
+    analytics_update.add_argument('--folder', default=DEFAULT_ANALYTICS_DIR, help="aggregates folder")
+
+    analytics_show = analytics_actions.add_parser('show', help="print the precomputed monthly summary")
+    analytics_show.add_argument('--folder', default=DEFAULT_ANALYTICS_DIR, help="aggregates folder")
+    analytics_show.add_argument('--months', type=int, default=12, help="number of most recent months to show")
+
+    terms = subparsers.add_parser('terms', help="term frequencies and TF-IDF rankings of the review text")
+    terms_actions = terms.add_subparsers(dest='action', required=True)
+
+    terms_update = terms_actions.add_parser('update', help="tokenize reviews from output folders into the index")
+    terms_update.add_argument('inputs', nargs='+', help="output folders or reviews.json files")
+    terms_update.add_argument('--folder', default=DEFAULT_TERMS_DIR, help="term index folder")
+
+    terms_top = terms_actions.add_parser('top', help="rank the most frequent terms per month or per field")
+    terms_top.add_argument('--folder', default=DEFAULT_TERMS_DIR, help="term index folder")
+    terms_top.add_argument('--by', choices=('month', 'field'), default='month', help="group the ranking by")
+    terms_top.add_argument('--fields', nargs='+', metavar='FIELD',
+                           help="only these fields: pros, cons, suggestions or category names (default: all)")
+    terms_top.add_argument('--from', dest='month_from', metavar='YYYY-MM', help="earliest review month")
+    terms_top.add_argument('--to', dest='month_to', metavar='YYYY-MM', help="latest review month")
+    terms_top.add_argument('--top', type=int, default=10, help="terms per group")
+    terms_top.add_argument('--tfidf', action='store_true', help="rank by summed TF-IDF instead of raw counts")
+
+    db = subparsers.add_parser('db', help="SQLite review database with full-text search")
+    db_actions = db.add_subparsers(dest='action', required=True)
+
+    db_import = db_actions.add_parser('import', help="add or update reviews from output folders")
+    db_import.add_argument('inputs', nargs='+', help="output folders or reviews.json files")
+    db_import.add_argument('--db', default=DEFAULT_REVIEW_DB, help="database file")
+
+    db_search = db_actions.add_parser('search', help="keyword search over all review text")
+    db_search.add_argument('query', help="FTS5 query, e.g. 'Überstunden' or 'gehalt AND pünktlich'")
+    db_search.add_argument('--db', default=DEFAULT_REVIEW_DB, help="database file")
+    db_search.add_argument('--limit', type=int, default=20)
+    db_search.add_argument('--from', dest='month_from', metavar='YYYY-MM', help="earliest review month")
+    db_search.add_argument('--to', dest='month_to', metavar='YYYY-MM', help="latest review month")
+
+    dataset = subparsers.add_parser('dataset', help="month-partitioned review dataset with a manifest")
+    dataset_actions = dataset.add_subparsers(dest='action', required=True)
+
+    dataset_write = dataset_actions.add_parser('write', help="add reviews from output folders to their partitions")
+    dataset_write.add_argument('inputs', nargs='+', help="output folders or reviews.json files")
+    dataset_write.add_argument('--root', default=DEFAULT_DATASET_DIR, help="dataset folder")
+    dataset_write.add_argument('--replace', action='store_true',
+                               help="overwrite the touched partitions instead of merging into them")
+
+    dataset_read = dataset_actions.add_parser('read', help="export the reviews of a range of months")
+    dataset_read.add_argument('--root', default=DEFAULT_DATASET_DIR, help="dataset folder")
+    dataset_read.add_argument('--from', dest='month_from', metavar='YYYY-MM', help="earliest review month")
+    dataset_read.add_argument('--to', dest='month_to', metavar='YYYY-MM', help="latest review month")
+    dataset_read.add_argument('--include-unknown', action='store_true', help="also load reviews without a date")
+    dataset_read.add_argument('--output-dir', default=None, help="output folder (default: outputs/<date> - dataset)")
+    dataset_read.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=DEFAULT_FORMATS)
+    dataset_read.add_argument('--json-mode', choices=JSON_MODES, default='pretty',
+                              help="pretty or compact JSON array, or JSON Lines (reviews.jsonl)")
+
+    dataset_status = dataset_actions.add_parser('status', help="list partitions and verify their content hashes")
+    dataset_status.add_argument('--root', default=DEFAULT_DATASET_DIR, help="dataset folder")
+
+    snapshot = subparsers.add_parser('snapshot', help="detect added, edited and removed reviews between crawls")
+    snapshot_actions = snapshot.add_subparsers(dest='action', required=True)
+
+    snapshot_commit = snapshot_actions.add_parser('commit', help="record a crawl as a new snapshot (stored as a delta)")
+    snapshot_commit.add_argument('inputs', nargs='+', help="output folders or reviews.json files of the crawl")
+    snapshot_commit.add_argument('--db', default=DEFAULT_SNAPSHOT_DB, help="snapshot database file")
+    snapshot_commit.add_argument('--label', help="snapshot name (default: the first input)")
+    snapshot_commit.add_argument('--partial', action='store_true',
+                                 help="the crawl did not cover every page, so missing reviews are not removals")
+    snapshot_commit.add_argument('--output', metavar='FILE', help="also write the change set to a JSON file")
+
+    snapshot_diff = snapshot_actions.add_parser('diff', help="diff two crawl outputs directly")
+    snapshot_diff.add_argument('old', help="older output folder or reviews.json file")
+    snapshot_diff.add_argument('new', help="newer output folder or reviews.json file")
+    snapshot_diff.add_argument('--partial', action='store_true', help="do not report missing reviews as removed")
+    snapshot_diff.add_argument('--output', metavar='FILE', help="write the change set to a JSON file")
+
+    snapshot_log = snapshot_actions.add_parser('log', help="list snapshots and their change counts")
+    snapshot_log.add_argument('--db', default=DEFAULT_SNAPSHOT_DB, help="snapshot database file")
+
+    snapshot_show = snapshot_actions.add_parser('show', help="write the change set of one snapshot")
+    snapshot_show.add_argument('id', type=int, help="snapshot id (see 'snapshot log')")
+    snapshot_show.add_argument('--db', default=DEFAULT_SNAPSHOT_DB, help="snapshot database file")
+    snapshot_show.add_argument('--output', metavar='FILE', help="write the change set to a JSON file")
+
+    snapshot_restore = snapshot_actions.add_parser('restore', help="rebuild the reviews of a snapshot from the deltas")
+    snapshot_restore.add_argument('id', type=int, nargs='?', help="snapshot id (default: the latest)")
+    snapshot_restore.add_argument('--db', default=DEFAULT_SNAPSHOT_DB, help="snapshot database file")
+    snapshot_restore.add_argument('--output-dir', default=None,
+                                  help="output folder (default: outputs/<date> - snapshot <id>)")
+    snapshot_restore.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=DEFAULT_FORMATS)
+
+    return parser
+
+
+def report_changes(changes, output=None):
+    """Print a change set summary and optionally write it to a JSON file"""
+    added, changed, removed = change_counts(changes)
+    print(f"  + {added} added, ~ {changed} changed, - {removed} removed")
+    for change in changes['changed'][:10]:
+        print(f"    ~ {change['review_id']}: {', '.join(sorted(change['fields']))}")
+    if output:
+        folder = os.path.dirname(output)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(changes, f, ensure_ascii=False, indent=2)
+        print(f"  Change set written to {output}")
+
+
+def run_snapshot(args):
+    """Record, diff, list, show or restore crawl snapshots"""
+    if args.action == 'diff':
+        old_reviews, new_reviews = merge_outputs([args.old]), merge_outputs([args.new])
+        start = time.perf_counter()
+        changes = diff_snapshots(old_reviews, new_reviews, detect_removed=not args.partial)
+        print(f"\nDiffed {len(old_reviews)} → {len(new_reviews)} reviews in {time.perf_counter() - start:.2f}s")
+        report_changes(changes, args.output)
+        return
+
+    store = SnapshotStore(args.db)
+    if args.action == 'commit':
+        reviews = merge_outputs(args.inputs)
+        start = time.perf_counter()
+        snapshot_id, changes = store.commit(reviews, label=args.label or args.inputs[0],
+                                            detect_removed=not args.partial)
+        print(f"\n✓ Snapshot {snapshot_id}: {len(reviews)} reviews, diffed in {time.perf_counter() - start:.2f}s")
+        report_changes(changes, args.output)
+    elif args.action == 'log':
+        for entry in store.history():
+            print(f"  #{entry['id']:<4} {entry['created_at']}  {entry['review_count']:>6} reviews  "
+                  f"+{entry['added']} ~{entry['changed']} -{entry['removed']}  {entry['label'] or ''}")
+    elif args.action == 'show':
+        print(f"Snapshot {args.id}:")
+        report_changes(store.changes(args.id), args.output)
+    else:
+        reviews = store.reconstruct(args.id)
+        label = args.id if args.id is not None else 'latest'
+        folder_name = args.output_dir or f"outputs/{datetime.now().strftime('%d%m%Y')} - snapshot {label}"
+        scraper = KununuScraper(DEFAULT_BASE_URL, use_selenium=False)
+        scraper.reviews_data = reviews
+        save_outputs(scraper, folder_name, args.formats)
+        print(f"\n✓ Restored {len(reviews)} reviews of snapshot {label} into '{folder_name}'")
+    store.close()
+
+
+def write_dataset(reviews, root, mode='append'):
+    """Add reviews to the partitioned dataset"""
+    store = DatasetStore(root)
+    written = store.write(reviews, mode=mode)
+    total = store.manifest.get('total_rows', 0)
+    print(f"✓ Wrote {len(written)} partition(s) in '{root}' ({total} reviews in dataset)")
+
+
+def run_dataset(args):
+    """Write to, read from or check the partitioned dataset"""
+    if args.action == 'write':
+        write_dataset(merge_outputs(args.inputs), args.root, mode='replace' if args.replace else 'append')
+        return
+
+    store = DatasetStore(args.root)
+    if args.action == 'read':
+        reviews = store.read(args.month_from, args.month_to, include_unknown=args.include_unknown)
+        if not reviews:
+            print("\n⚠ No reviews in the requested months.")
+            return
+        folder_name = args.output_dir or f"outputs/{datetime.now().strftime('%d%m%Y')} - dataset"
+        scraper = KununuScraper(DEFAULT_BASE_URL, use_selenium=False)
+        scraper.reviews_data = reviews
+        print("\nSaving dataset extract...")
+        save_outputs(scraper, folder_name, args.formats, json_mode=args.json_mode)
+        print(f"\n✓ Exported {len(reviews)} reviews into '{folder_name}'")
+    else:
+        for key, entry in store.partitions().items():
+            print(f"  {key:<8} {entry['rows']:>7} rows  {entry['sha256'][:12]}  {entry['updated_at']}")
+        problems = store.verify()
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        print(f"{len(store.partitions())} partitions, {store.manifest.get('total_rows', 0)} reviews"
+              + (", all hashes match" if not problems else f", {len(problems)} problem(s)"))
+
+
+def run_db(args):
+    """Import reviews into the SQLite database or search it"""
+    store = ReviewStore(args.db)
+    if args.action == 'import':
+        reviews = merge_outputs(args.inputs)
+        start = time.perf_counter()
+        store.upsert_reviews(reviews)
+        print(f"✓ Imported {len(reviews)} reviews in {time.perf_counter() - start:.2f}s "
+              f"({store.count()} reviews in {args.db})")
+    else:
+        start = time.perf_counter()
+        try:
+            results = store.search(args.query, limit=args.limit, month_from=args.month_from, month_to=args.month_to)
+        except sqlite3.OperationalError as e:
+            store.close()
+            print(f"✗ Invalid search query ({e}); quote phrases and words with punctuation, "
+                  f"e.g. '\"Work-Life-Balance\" AND gehalt'")
+            sys.exit(1)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for result in results:
+            month = (result['review_month'] or '')[:7]
+            print(f"\n[{month}] {result['title']} ({result['recommendation']})")
+            print(f"  {result['snippet']}")
+        print(f"\n{len(results)} results in {elapsed_ms:.1f} ms")
+    store.close()
+
+
+def update_analytics(reviews, folder):
+    """Add reviews to the persisted monthly aggregates"""
+    aggregates = MonthlyAggregates(folder)
+    added = aggregates.update(reviews)
+    aggregates.close()
+    print(f"✓ Added {added} new reviews to the monthly aggregates in '{folder}'")
+
+
+def update_terms(reviews, folder):
+    """Add reviews to the persisted term-frequency index"""
+    index = TermIndex(folder)
+    added = index.update(reviews)
+    index.close()
+    print(f"✓ Added {added} new reviews to the term index in '{folder}' ({len(index.vocabulary)} terms)")
+
+
+def run_terms(args):
+    """Update the term index or print term rankings"""
+    if args.action == 'update':
+        update_terms(merge_outputs(args.inputs), args.folder)
+        return
+    index = TermIndex(args.folder)
+    start = time.perf_counter()
+    ranking = index.top_terms(by=args.by, n=args.top, fields=args.fields, month_from=args.month_from,
+                              month_to=args.month_to, weighting='tfidf' if args.tfidf else 'tf')
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    index.close()
+    for group, terms in ranking.groupby(args.by, sort=True):
+        print(f"{group}: " + ", ".join(f"{row.term} ({row.score:.3g})" for row in terms.itertuples()))
+    print(f"\nRanked in {elapsed_ms:.1f} ms")
+
+
+def run_analytics(args):
+    """Update or show the monthly aggregates"""
+    if args.action == 'update':
+        update_analytics(merge_outputs(args.inputs), args.folder)
+    else:
+        summary = load_summary(args.folder)
+        with pd.option_context('display.max_columns', None, 'display.width', 200):
+            print(summary.tail(args.months))
+
+
+def run_queue(args):
+    """Run one of the work-queue actions (init, worker, status, collect)"""
+    if args.action == 'worker':
+        queue = PageQueue(args.db, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+        scraper = KununuScraper(args.base_url, use_selenium=args.use_selenium, extraction_mode=args.extraction_mode)
+        run_worker(queue, scraper, worker_id=args.worker_id)
+    else:
+        queue = PageQueue(args.db)
+
+    if args.action == 'init':
+        added = queue.enqueue(range(args.start_page, args.end_page + 1))
+        print(f"✓ Added {added} pages ({args.start_page}-{args.end_page}) to {args.db}")
+
+    elif args.action == 'collect':
+        reviews = queue.collect()
+        if not reviews:
+            print("\n⚠ The queue has no results yet.")
+        else:
+            folder_name = args.output_dir or f"outputs/{datetime.now().strftime('%d%m%Y')} - queue"
+            scraper = KununuScraper(DEFAULT_BASE_URL, use_selenium=False)
+            scraper.reviews_data = reviews
+            print("\nSaving collected data...")
+            save_outputs(scraper, folder_name, args.formats)
+            print(f"\n✓ Collected {len(reviews)} reviews into '{folder_name}'")
+
+    counts = queue.status()
+    print(f"Queue {args.db}: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    for page_num, attempts, error in queue.failed_pages():
+        print(f"  ✗ page {page_num} failed after {attempts} attempts: {error}")
+    queue.close()
+
+
+def run_serve(args):
+    """Run the scrape service until interrupted"""
+    def make_scraper():
+        return KununuScraper(args.base_url, use_selenium=args.use_selenium, extraction_mode=args.extraction_mode,
+                             page_delay=args.page_delay)
+
+    service = ScrapeService(make_scraper, save_outputs, size=args.pool_size, export_formats=EXPORT_FORMATS,
+                            default_base_url=args.base_url, allow_any_url=args.allow_any_url,
+                            retention=args.job_retention)
+    serve(service, args.host, args.port)
+
+
+def run_budgeted(args, pages, folder_name):
+    """Crawl pages by priority within the --budget; return a scraper holding the collected reviews"""
+    workers = itertools.count(1)
+
+    def make_scraper():
+        # Workers share one dedup index in the coordinator; SQLite handles stay on the main thread
+        # Each browser gets its own trace folder (and summary)
+        trace_dir = os.path.join(args.trace_dir, f"worker_{next(workers)}") if args.trace_dir else None
+        return KununuScraper(args.base_url, use_selenium=args.use_selenium, extraction_mode=args.extraction_mode,
+                             challenge_wait=args.challenge_wait, trace_dir=trace_dir,
+                             trace_threshold=args.trace_threshold, hedge=args.hedge,
+                             hedge_percentile=args.hedge_percentile, hedge_budget=args.hedge_budget)
+
+    if args.parse_cache:
+        print("⚠ --parse-cache is not used together with --budget")
+    history = PageHistory(args.page_history)
+    crawl = BudgetedCrawl(make_scraper, args.budget * 60, max_workers=args.max_workers, history=history,
+                          recent_pages=args.recent_pages, max_retries=args.max_retries, dedup_path=args.dedup_index)
+    crawl.run(pages)
+    history.close()
+    print(f"Crawl record written to {crawl.write_record(folder_name)}")
+    if crawl.pending:
+        print(f"⚠ Budget spent with {len(crawl.pending)} pages pending: {crawl.pending[:20]}"
+              + (" ..." if len(crawl.pending) > 20 else ""))
+
+    scraper = KununuScraper(args.base_url, use_selenium=False)
+    scraper.reviews_data = crawl.reviews
+    scraper.failed_pages = {page: status for page, status in crawl.failed_pages.items() if page not in crawl.pending}
+    return scraper
+
+
+def discover_last_page(args):
+    """Fetch the start page once and return the last page of the listing (None if it shows no review count)"""
+    scraper = KununuScraper(args.base_url, use_selenium=args.use_selenium, extraction_mode=args.extraction_mode,
+                            challenge_wait=args.challenge_wait)
+    scraper.start()
+    try:
+        scraper.fetch_page(args.start_page)
+    finally:
+        scraper.close()
+    plan = scraper.make_plan(start_page=args.start_page)
+    return plan.last_page if plan else None
+
+
+def run_scrape(args):
+    """Scrape the requested page range (or shard of it) and save the results"""
+    # The whole listing: shards and budgeted crawls need the page set upfront, a
+    # sequential crawl plans it from its first page
+    discover = args.all_pages and args.end_page is None and not (args.budget or args.shard)
+    if args.all_pages and args.end_page is None and not discover:
+        args.end_page = discover_last_page(args)
+        if args.end_page is None:
+            print("⚠ The listing shows no review count. Use --end-page instead.")
+            return
+    if discover:
+        args.end_page = args.start_page
+    elif args.end_page is None:
+        max_pages = args.pages
+        if max_pages is None:
+            if sys.stdin.isatty():
+                max_pages = int(input("\nHow many pages to scrape? (Enter number, e.g., 5): ") or "5")
+            else:
+                max_pages = 5
+        args.end_page = args.start_page + max_pages - 1
+    if args.end_page < args.start_page:
+        print(f"⚠ End page {args.end_page} is before start page {args.start_page}. Nothing to do.")
+        return
+
+    pages = shard_pages(args.start_page, args.end_page, args.shard)
+    if args.shard:
+        print(f"\nShard {args.shard[0]}/{args.shard[1]}: {len(pages)} of pages {args.start_page}-{args.end_page}")
+    if args.use_selenium:
+        print("\nSelenium mode is enabled (Chrome browser required)")
+    else:
+        print("\nRequests mode is enabled (no browser needed)")
+
+    folder_name = args.output_dir or default_output_folder(args.start_page, args.end_page, args.shard)
+
+    # Create scraper instance
+    if args.budget:
+        scraper = run_budgeted(args, pages, folder_name)
+    else:
+        scraper = KununuScraper(args.base_url, use_selenium=args.use_selenium, dedup_path=args.dedup_index,
+                                parse_cache_path=args.parse_cache, extraction_mode=args.extraction_mode,
+                                challenge_wait=args.challenge_wait, trace_dir=args.trace_dir,
+                                trace_threshold=args.trace_threshold, hedge=args.hedge,
+                                hedge_percentile=args.hedge_percentile, hedge_budget=args.hedge_budget)
+        scraper.scrape_all_pages(pages=pages, max_retries=args.max_retries, discover=discover)
+        if discover and not args.output_dir:
+            last_page = scraper.plan.last_page if scraper.plan else max(scraper.page_counts, default=args.start_page)
+            folder_name = default_output_folder(args.start_page, last_page)
 
     # Save data in multiple formats in the new folder
     if scraper.reviews_data:
         print("\nSaving data...")
-        scraper.save_to_json(filename=os.path.join(folder_name, "reviews.json"))
-        scraper.save_to_csv(filename=os.path.join(folder_name, "reviews.csv"))
-        scraper.save_to_excel(filename=os.path.join(folder_name, "reviews.xlsx"))
+        save_outputs(scraper, folder_name, args.formats, json_mode=args.json_mode)
 
         print("\n" + "=" * 60)
         print(f"✓ Scraping completed successfully!")
         print(f"✓ Total reviews collected: {len(scraper.reviews_data)}")
         print(f"✓ Check the '{folder_name}' folder for results")
+        if scraper.failed_pages:
+            print(f"⚠ Pages never recovered: {', '.join(str(p) for p in sorted(scraper.failed_pages))}")
         print("=" * 60)
+
+        if args.analytics_dir:
+            update_analytics(scraper.reviews_data, args.analytics_dir)
+        if args.terms_dir:
+            update_terms(scraper.reviews_data, args.terms_dir)
+        if args.dataset_dir:
+            write_dataset(scraper.reviews_data, args.dataset_dir)
     else:
         print("\n⚠ No data was scraped. Please check the website structure or try again.")
 
 
+def run_merge(args):
+    """Merge shard outputs into a single deduplicated dataset"""
+    reviews = merge_outputs(args.inputs)
+    if not reviews:
+        print("\n⚠ No reviews found in the given inputs.")
+        return
+
+    folder_name = args.output_dir or f"outputs/{datetime.now().strftime('%d%m%Y')} - merged"
+    scraper = KununuScraper(DEFAULT_BASE_URL, use_selenium=False)
+    scraper.reviews_data = reviews
+    print("\nSaving merged data...")
+    save_outputs(scraper, folder_name, args.formats, json_mode=args.json_mode)
+    print(f"\n✓ Merged {len(reviews)} unique reviews into '{folder_name}'")
+
+
+def main(argv=None):
+    """Main function to run the scraper"""
+    print("=" * 60)
+    print("Kununu Scraper - Deutsche Post & DHL Reviews")
+    print("=" * 60)
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # 'scrape' is the default command, so `python scraperV3.py --pages 5` keeps working
+    if not argv or argv[0] not in ('scrape', 'merge', 'queue', 'analytics', 'terms', 'db', 'dataset', 'snapshot', 'serve', '-h', '--help'):
+        argv = ['scrape'] + argv
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'merge':
+        run_merge(args)
+    elif args.command == 'queue':
+        run_queue(args)
+    elif args.command == 'analytics':
+        run_analytics(args)
+    elif args.command == 'terms':
+        run_terms(args)
+    elif args.command == 'db':
+        run_db(args)
+    elif args.command == 'dataset':
+        run_dataset(args)
+    elif args.command == 'snapshot':
+        run_snapshot(args)
+    elif args.command == 'serve':
+        run_serve(args)
+    else:
+        run_scrape(args)
+
+
 if __name__ == "__main__":
     main()
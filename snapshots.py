@@ -0,0 +1,261 @@
+"""
+Change detection between crawl snapshots
+
+Every review is reduced to one hash per field (and a record hash over
+those), keyed by its review identity. Two snapshots are diffed by comparing
+hashes only, which yields compact added / changed / removed change sets.
+The SnapshotStore keeps the current hashes plus the change set of every
+snapshot, so history is stored as deltas instead of full copies and any
+snapshot can be rebuilt by replaying them.
+
+Without a site review ID the identity is a content hash, so an edited review
+would look like a removal plus an addition. match_edited pairs such leftovers
+up again when their metadata (MATCH_FIELDS) is the same and most of their
+fields still are, and keeps the review under the identity it was first seen
+with, so the edit is reported as changed.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from normalize import typed_reviews
+from review_identity import CONTENT_HASH_PREFIX, review_identity
+
+
+# Fields that are not part of a review's content
+IGNORED_FIELDS = ('review_id',)
+# Fields a review keeps when its text is edited; content-hash identities are re-matched on them
+MATCH_FIELDS = ('date', 'position', 'department', 'location')
+# Share of a review's fields that must be unchanged for two records to be the same edited review
+MATCH_SHARE = 0.5
+
+
+def _hash_value(value):
+    if isinstance(value, str):
+        data = value.encode('utf-8')
+    elif isinstance(value, (dict, list)):
+        data = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    else:
+        # Scalars: keep the type, so 4 and '4' hash differently
+        data = f"{type(value).__name__}:{value!r}".encode('utf-8')
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def field_hashes(review):
+    """Return {field: hash} for the content fields of a typed review"""
+    return {field: _hash_value(value) for field, value in review.items() if field not in IGNORED_FIELDS}
+
+
+def record_hash(hashes):
+    """Combine a review's field hashes into one hash"""
+    data = '\x1f'.join(f"{field}={value}" for field, value in sorted(hashes.items()))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def index_reviews(reviews):
+    """Return {identity: (record hash, field hashes, typed review)} for a list of scraped reviews"""
+    index = {}
+    for review in typed_reviews(reviews):
+        review['review_id'] = review_identity(review)
+        hashes = field_hashes(review)
+        index[review['review_id']] = (record_hash(hashes), hashes, review)
+    return index
+
+
+def match_edited(old, new):
+    """Return new with edited reviews moved to their identity in old
+
+    Only content-hash identities present on one side are matched: a new one
+    takes the old one with the same MATCH_FIELDS hashes and the most equal
+    field hashes (at least MATCH_SHARE of them).
+    """
+    candidates = {}
+    for identity, (_, hashes, _) in old.items():
+        if identity not in new and identity.startswith(CONTENT_HASH_PREFIX):
+            key = tuple(hashes.get(field) for field in MATCH_FIELDS)
+            candidates.setdefault(key, []).append(identity)
+    if not candidates:
+        return new
+
+    matched = {}
+    for identity, (digest, hashes, review) in new.items():
+        if identity in old or not identity.startswith(CONTENT_HASH_PREFIX):
+            continue
+        group = candidates.get(tuple(hashes.get(field) for field in MATCH_FIELDS))
+        if not group:
+            continue
+        scores = {candidate: sum(old[candidate][1].get(field) == value for field, value in hashes.items())
+                  for candidate in group}
+        best = max(group, key=scores.get)
+        if scores[best] >= MATCH_SHARE * len(hashes):
+            group.remove(best)
+            matched[identity] = best
+
+    rekeyed = {}
+    for identity, (digest, hashes, review) in new.items():
+        if identity in matched:
+            identity = matched[identity]
+            if review is not None:
+                review = dict(review, review_id=identity)
+        rekeyed[identity] = (digest, hashes, review)
+    return rekeyed
+
+
+def diff_index(old, new, detect_removed=True):
+    """Compare two hash indexes ({identity: (record hash, field hashes, ...)}); return a change set
+
+    added holds the full new reviews, changed only the fields whose hash
+    differs (with their new values, plus 'dropped' for fields that no longer
+    exist) and removed the identities that are gone. Pass detect_removed=False for
+    partial crawls, where a missing review is not necessarily deleted.
+    """
+    added, changed, removed = [], [], []
+    for identity, (digest, hashes, review) in new.items():
+        previous = old.get(identity)
+        if previous is None:
+            added.append(review)
+        elif previous[0] != digest:
+            old_hashes = previous[1]
+            change = {'review_id': identity,
+                      'fields': {field: review[field] for field, value in hashes.items()
+                                 if old_hashes.get(field) != value}}
+            dropped = [field for field in old_hashes if field not in hashes]
+            if dropped:
+                change['dropped'] = dropped
+            changed.append(change)
+    if detect_removed:
+        removed = [identity for identity in old if identity not in new]
+    return {'added': added, 'changed': changed, 'removed': removed}
+
+
+def diff_snapshots(old_reviews, new_reviews, detect_removed=True):
+    """Diff two lists of scraped reviews (e.g. two reviews.json dumps)"""
+    old = index_reviews(old_reviews)
+    return diff_index(old, match_edited(old, index_reviews(new_reviews)), detect_removed=detect_removed)
+
+
+def change_counts(changes):
+    """Return (added, changed, removed) counts of a change set"""
+    return len(changes['added']), len(changes['changed']), len(changes['removed'])
+
+
+class SnapshotStore:
+    def __init__(self, db_path='outputs/snapshots.db'):
+        """Snapshot history stored as change sets, plus the hashes of the latest snapshot"""
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT NOT NULL,
+                label TEXT,
+                review_count INTEGER,
+                added INTEGER,
+                changed INTEGER,
+                removed INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+                review_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                data TEXT,
+                PRIMARY KEY (snapshot_id, review_id)
+            );
+            CREATE TABLE IF NOT EXISTS current (
+                review_id TEXT PRIMARY KEY,
+                record_hash TEXT NOT NULL,
+                field_hashes TEXT NOT NULL
+            );
+        """)
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def current_index(self):
+        """Return the hash index of the latest snapshot (without review contents)"""
+        return {
+            review_id: (digest, json.loads(hashes), None)
+            for review_id, digest, hashes in self.conn.execute(
+                "SELECT review_id, record_hash, field_hashes FROM current")
+        }
+
+    def commit(self, reviews, label=None, detect_removed=True):
+        """Diff reviews against the latest snapshot, store the change set as a new snapshot; return (id, changes)"""
+        old = self.current_index()
+        new = match_edited(old, index_reviews(reviews))
+        changes = diff_index(old, new, detect_removed=detect_removed)
+        added, changed, removed = change_counts(changes)
+
+        rows = [(review['review_id'], 'added', json.dumps(review, ensure_ascii=False))
+                for review in changes['added']]
+        rows += [(change['review_id'], 'changed',
+                  json.dumps({key: value for key, value in change.items() if key != 'review_id'}, ensure_ascii=False))
+                 for change in changes['changed']]
+        rows += [(review_id, 'removed', None) for review_id in changes['removed']]
+        touched = [review['review_id'] for review in changes['added']]
+        touched += [change['review_id'] for change in changes['changed']]
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (created_at, label, review_count, added, changed, removed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(timespec='seconds'), label, len(new), added, changed, removed)
+            )
+            snapshot_id = cursor.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO changes (snapshot_id, review_id, kind, data) VALUES ({snapshot_id}, ?, ?, ?)", rows
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO current (review_id, record_hash, field_hashes) VALUES (?, ?, ?)",
+                [(review_id, new[review_id][0], json.dumps(new[review_id][1])) for review_id in touched]
+            )
+            self.conn.executemany("DELETE FROM current WHERE review_id = ?",
+                                  [(review_id,) for review_id in changes['removed']])
+        return snapshot_id, changes
+
+    def history(self):
+        """Return all snapshots, oldest first"""
+        columns = ['id', 'created_at', 'label', 'review_count', 'added', 'changed', 'removed']
+        return [dict(zip(columns, row)) for row in self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM snapshots ORDER BY id")]
+
+    def changes(self, snapshot_id):
+        """Return the change set stored for one snapshot"""
+        changes = {'added': [], 'changed': [], 'removed': []}
+        for review_id, kind, data in self.conn.execute(
+                "SELECT review_id, kind, data FROM changes WHERE snapshot_id = ? ORDER BY rowid", (snapshot_id,)):
+            if kind == 'added':
+                changes['added'].append(json.loads(data))
+            elif kind == 'changed':
+                changes['changed'].append(dict(review_id=review_id, **json.loads(data)))
+            else:
+                changes['removed'].append(review_id)
+        return changes
+
+    def reconstruct(self, snapshot_id=None):
+        """Rebuild the reviews of a snapshot (default: the latest) by replaying the change sets"""
+        reviews = {}
+        sql = "SELECT review_id, kind, data FROM changes"
+        params = ()
+        if snapshot_id is not None:
+            sql += " WHERE snapshot_id <= ?"
+            params = (snapshot_id,)
+        for review_id, kind, data in self.conn.execute(sql + " ORDER BY snapshot_id, rowid", params):
+            if kind == 'added':
+                reviews[review_id] = json.loads(data)
+            elif kind == 'changed':
+                change = json.loads(data)
+                review = reviews.setdefault(review_id, {'review_id': review_id})
+                review.update(change['fields'])
+                for field in change.get('dropped', ()):
+                    review.pop(field, None)
+            else:
+                reviews.pop(review_id, None)
+        return list(reviews.values())
@@ -0,0 +1,175 @@
+"""
+Term frequencies and TF-IDF over the review text
+
+Every text field of a review (pros, cons, suggestions and each category
+comment) is one document. Documents are tokenized once with vectorized
+pandas string operations into a sparse document-term matrix (SciPy CSR),
+which is stored with the vocabulary and per-document month/field labels.
+Rankings per month or per field are sparse matrix products, and new
+reviews only append rows (and vocabulary columns) to the stored matrix.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from normalize import typed_reviews
+from review_identity import DedupIndex, review_identity
+
+
+TEXT_FIELDS = ('pros', 'cons', 'suggestions')
+TOKEN_PATTERN = r'[^\W\d_]{3,}'
+UNKNOWN_MONTH = 'unknown'
+
+MATRIX_FILE = 'terms.npz'
+VOCABULARY_FILE = 'vocabulary.json'
+DOCUMENTS_FILE = 'documents.npz'
+SEEN_FILE = 'seen_reviews.db'
+
+# Frequent German function words (plus a few words every review uses)
+STOPWORDS = frozenset("""
+aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes auch auf aus bei bin
+bis bist da damit dann das dass daß dem den denn der des dessen die dies diese diesem diesen dieser dieses doch dort
+durch ein eine einem einen einer eines einige einmal er es etwas euch euer für gegen gibt hab habe haben hat hatte
+hatten hier hin hinter ich ihr ihre ihrem ihren ihrer ihm ihn im in ins ist jede jedem jeden jeder jedes jetzt kann
+kein keine keinem keinen keiner können könnte man manche manchem manchen mancher mehr mein meine meinem meinen
+meiner mich mir mit muss musste nach nicht nichts noch nun nur oder ohne sehr sein seine seinem seinen seiner seit
+sich sie sind so solche soll sollte sondern sonst über um und uns unser unsere unter viel vom von vor war waren
+warum was weil welche welchem welchen welcher wenn wer werde werden wie wieder will wir wird wo wollen wurde wurden
+zu zum zur zwar zwischen immer ganz gut schon wenig einfach sowie etc bzw
+""".split())
+
+
+def review_documents(reviews):
+    """Split reviews into text documents; return a frame with review_id, month, field and text"""
+    rows = []
+    for review in typed_reviews(reviews):
+        identity = review_identity(review)
+        month = (review.get('review_month') or '')[:7] or UNKNOWN_MONTH
+        for field in TEXT_FIELDS:
+            if review.get(field):
+                rows.append((identity, month, field, review[field]))
+        for category, comment in (review.get('categories') or {}).items():
+            if comment:
+                rows.append((identity, month, category, comment))
+    return pd.DataFrame(rows, columns=['review_id', 'month', 'field', 'text'])
+
+
+def tokenize(texts):
+    """Tokenize a Series of texts; return (document positions, tokens) as flat arrays"""
+    tokens = texts.str.casefold().str.findall(TOKEN_PATTERN).explode().dropna()
+    tokens = tokens[~tokens.isin(STOPWORDS)]
+    return tokens.index.to_numpy(), tokens.to_numpy(dtype=object)
+
+
+def tfidf(counts):
+    """Return the L2-normalized TF-IDF matrix of a document-term count matrix"""
+    documents = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + documents) / (1 + df)) + 1
+    weighted = counts.astype('float64') @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ weighted
+
+
+class TermIndex:
+    def __init__(self, folder='outputs/terms'):
+        """Persisted document-term matrix of all reviews added so far"""
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.seen = DedupIndex(os.path.join(folder, SEEN_FILE))
+        matrix_path = os.path.join(folder, MATRIX_FILE)
+        if os.path.exists(matrix_path):
+            self.counts = sparse.load_npz(matrix_path).tocsr()
+            with open(os.path.join(folder, VOCABULARY_FILE), encoding='utf-8') as f:
+                self.vocabulary = json.load(f)
+            documents = np.load(os.path.join(folder, DOCUMENTS_FILE), allow_pickle=False)
+            self.months = documents['months']
+            self.fields = documents['fields']
+        else:
+            self.counts = sparse.csr_matrix((0, 0), dtype='int32')
+            self.vocabulary = []
+            self.months = np.array([], dtype=str)
+            self.fields = np.array([], dtype=str)
+        self._term_index = pd.Index(self.vocabulary)
+
+    def update(self, reviews):
+        """Tokenize reviews not added before and append them; return how many were added"""
+        new_reviews = {}
+        for review in reviews:
+            identity = review_identity(review)
+            if identity not in self.seen:
+                new_reviews.setdefault(identity, review)
+        if not new_reviews:
+            return 0
+
+        documents = review_documents(list(new_reviews.values()))
+        positions, tokens = tokenize(documents['text'])
+        codes = self._term_index.get_indexer(tokens)
+        unknown = codes == -1
+        if unknown.any():
+            new_terms = pd.unique(tokens[unknown])
+            self.vocabulary.extend(new_terms.tolist())
+            self._term_index = pd.Index(self.vocabulary)
+            codes[unknown] = self._term_index.get_indexer(tokens[unknown])
+
+        # Duplicate (document, term) pairs are summed into counts
+        delta = sparse.csr_matrix((np.ones(len(codes), dtype='int32'), (positions, codes)),
+                                  shape=(len(documents), len(self.vocabulary)))
+        self.counts.resize((self.counts.shape[0], len(self.vocabulary)))
+        self.counts = sparse.vstack([self.counts, delta], format='csr')
+        self.months = np.concatenate([self.months, documents['month'].to_numpy(dtype=str)])
+        self.fields = np.concatenate([self.fields, documents['field'].to_numpy(dtype=str)])
+        self.save()
+        for identity in new_reviews:
+            self.seen.add(identity)
+        self.seen.flush()
+        return len(new_reviews)
+
+    def save(self):
+        """Write the matrix, vocabulary and document labels"""
+        sparse.save_npz(os.path.join(self.folder, MATRIX_FILE), self.counts)
+        with open(os.path.join(self.folder, VOCABULARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.vocabulary, f, ensure_ascii=False)
+        np.savez(os.path.join(self.folder, DOCUMENTS_FILE), months=self.months, fields=self.fields)
+
+    def group_scores(self, by='month', fields=None, month_from=None, month_to=None, weighting='tf'):
+        """Sum term counts (or TF-IDF weights) per month or per field; return (group labels, groups x terms matrix)"""
+        mask = np.ones(len(self.months), dtype=bool)
+        if fields:
+            mask &= np.isin(self.fields, list(fields))
+        if month_from:
+            mask &= (self.months >= month_from) & (self.months != UNKNOWN_MONTH)
+        if month_to:
+            mask &= self.months <= month_to
+        rows = np.flatnonzero(mask)
+        labels = self.months if by == 'month' else self.fields
+        group_codes, groups = pd.factorize(labels[rows], sort=True)
+        # Indicator matrix (groups x documents) turns the group-by into one sparse product
+        indicator = sparse.csr_matrix((np.ones(len(rows)), (group_codes, rows)),
+                                      shape=(len(groups), self.counts.shape[0]))
+        matrix = tfidf(self.counts) if weighting == 'tfidf' else self.counts
+        return list(groups), indicator @ matrix
+
+    def top_terms(self, by='month', n=10, **kwargs):
+        """Return the n highest-scoring terms of every month (or field) as a frame"""
+        groups, scores = self.group_scores(by=by, **kwargs)
+        scores = scores.tocsr()
+        vocabulary = np.array(self.vocabulary, dtype=object)
+        frames = []
+        for idx, group in enumerate(groups):
+            row = scores.getrow(idx)
+            top = np.argsort(-row.data, kind='stable')[:n]
+            frames.append(pd.DataFrame({by: group, 'rank': np.arange(1, len(top) + 1),
+                                        'term': vocabulary[row.indices[top]], 'score': row.data[top]}))
+        if not frames:
+            return pd.DataFrame(columns=[by, 'rank', 'term', 'score'])
+        return pd.concat(frames, ignore_index=True)
+
+    def close(self):
+        """Close the index of added reviews"""
+        self.seen.close()